@@ -18,8 +18,8 @@ from app.shared.models.role import Role
 from app.shared.models.school import School
 from app.modules.academics.models import AcademicYear, Term, ClassRoom, Stream
 from app.modules.evoucher.models import EVoucher, VoucherAttemptLog
-from app.modules.students.models import Student, Guardian, StudentMedical, StudentAccount
-from app.modules.admissions.models import Admission
+from app.modules.students.models import Student, Guardian, StudentMedical, StudentAccount, StudentEnrollment
+from app.modules.admissions.models import Admission, IndexNumberSequence
 from app.shared.models.audit import AuditLog
 
 # this is the Alembic Config object, which provides
@@ -38,6 +38,15 @@ config.set_main_option("sqlalchemy.url", settings.sqlalchemy_database_uri)
 # for 'autogenerate' support
 target_metadata = Base.metadata
 
+from app.core.search import TRIGRAM_INDEXES
+TRIGRAM_INDEX_NAMES = {name for name, _, _ in TRIGRAM_INDEXES}
+
+def include_object(object, name, type_, reflected, compare_to):
+    # Trigram indexes are managed by migrations only, not declared on the models
+    if type_ == "index" and name in TRIGRAM_INDEX_NAMES:
+        return False
+    return True
+
 def run_migrations_offline() -> None:
     """Run migrations in 'offline' mode.
 
@@ -54,6 +63,7 @@ def run_migrations_offline() -> None:
     context.configure(
         url=url,
         target_metadata=target_metadata,
+        include_object=include_object,
         literal_binds=True,
         dialect_opts={"paramstyle": "named"},
     )
@@ -87,7 +97,8 @@ def run_migrations_online() -> None:
 
     with connectable.connect() as connection:
         context.configure(
-            connection=connection, target_metadata=target_metadata
+            connection=connection, target_metadata=target_metadata,
+            include_object=include_object
         )
 
         with context.begin_transaction():
@@ -0,0 +1,35 @@
+"""add index number sequence table
+
+Revision ID: 00af285e16bb
+Revises: d5644c5c5f96
+Create Date: 2026-10-18 05:56:22.529806
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '00af285e16bb'
+down_revision: Union[str, Sequence[str], None] = 'd5644c5c5f96'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Counters start empty; each (level, year) row is seeded from existing index
+    # numbers the first time it is allocated from.
+    op.create_table('indexnumbersequence',
+    sa.Column('level', sa.String(), nullable=False),
+    sa.Column('year', sa.String(), nullable=False),
+    sa.Column('last_value', sa.Integer(), nullable=False),
+    sa.PrimaryKeyConstraint('level', 'year')
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table('indexnumbersequence')
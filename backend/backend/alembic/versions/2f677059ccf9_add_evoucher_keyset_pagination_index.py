@@ -0,0 +1,31 @@
+"""add evoucher keyset pagination index
+
+Revision ID: 2f677059ccf9
+Revises: 3865ce43eec6
+Create Date: 2026-10-18 05:46:18.374553
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '2f677059ccf9'
+down_revision: Union[str, Sequence[str], None] = '3865ce43eec6'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(
+        'ix_evoucher_academic_year_id_status_id', 'evoucher',
+        ['academic_year_id', 'status', 'id'], unique=False
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_evoucher_academic_year_id_status_id', table_name='evoucher')
@@ -0,0 +1,28 @@
+"""add studentaccount tokens_valid_after
+
+Revision ID: 5fd7225edbaf
+Revises: ec1a8e60c550
+Create Date: 2026-10-18 06:40:12.518204
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '5fd7225edbaf'
+down_revision: Union[str, Sequence[str], None] = 'ec1a8e60c550'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.add_column('studentaccount', sa.Column('tokens_valid_after', sa.DateTime(), nullable=True))
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column('studentaccount', 'tokens_valid_after')
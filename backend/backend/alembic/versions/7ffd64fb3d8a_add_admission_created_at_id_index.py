@@ -0,0 +1,28 @@
+"""add admission created_at id index
+
+Revision ID: 7ffd64fb3d8a
+Revises: 00af285e16bb
+Create Date: 2026-10-18 05:59:08.065307
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '7ffd64fb3d8a'
+down_revision: Union[str, Sequence[str], None] = '00af285e16bb'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index('ix_admission_created_at_id', 'admission', ['created_at', 'id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_admission_created_at_id', table_name='admission')
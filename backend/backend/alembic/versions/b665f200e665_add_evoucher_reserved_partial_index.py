@@ -0,0 +1,50 @@
+"""add evoucher reserved partial index
+
+Revision ID: b665f200e665
+Revises: 2f677059ccf9
+Create Date: 2026-10-18 05:49:20.842389
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'b665f200e665'
+down_revision: Union[str, Sequence[str], None] = '2f677059ccf9'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def reserved_label() -> str:
+    """
+    The stored label for VoucherStatus.RESERVED. The app persists enum names, but the
+    initial migration created the Postgres type with the values ('Reserved'), so the
+    predicate must use whichever label this database's type actually has.
+    """
+    bind = op.get_bind()
+    if bind.dialect.name != 'postgresql':
+        return 'RESERVED'
+    labels = set(bind.execute(sa.text(
+        "SELECT e.enumlabel FROM pg_enum e JOIN pg_type t ON t.oid = e.enumtypid "
+        "WHERE t.typname = 'voucherstatus'"
+    )).scalars())
+    return 'RESERVED' if 'RESERVED' in labels else 'Reserved'
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    predicate = sa.text(f"status = '{reserved_label()}'")
+    op.create_index(
+        'ix_evoucher_status_reserved_at_reserved', 'evoucher',
+        ['status', 'reserved_at'], unique=False,
+        postgresql_where=predicate,
+        sqlite_where=predicate
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_evoucher_status_reserved_at_reserved', table_name='evoucher')
@@ -0,0 +1,47 @@
+"""add trigram search indexes
+
+Revision ID: d5644c5c5f96
+Revises: d63e2f6cda2f
+Create Date: 2026-10-18 05:55:05.712765
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd5644c5c5f96'
+down_revision: Union[str, Sequence[str], None] = 'd63e2f6cda2f'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+TRGM_INDEXES = [
+    ('ix_student_first_name_trgm', 'student', 'first_name'),
+    ('ix_student_last_name_trgm', 'student', 'last_name'),
+    ('ix_student_index_number_trgm', 'student', 'index_number'),
+    ('ix_evoucher_voucher_number_trgm', 'evoucher', 'voucher_number'),
+]
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # Trigram indexes are Postgres-only; other dialects use the plain ILIKE fallback
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    op.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name, table, [column], unique=False,
+            postgresql_using='gin', postgresql_ops={column: 'gin_trgm_ops'}
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    if op.get_bind().dialect.name != 'postgresql':
+        return
+    for name, table, _ in reversed(TRGM_INDEXES):
+        op.drop_index(name, table_name=table)
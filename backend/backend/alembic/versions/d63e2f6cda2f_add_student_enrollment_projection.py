@@ -0,0 +1,85 @@
+"""add student enrollment projection
+
+Revision ID: d63e2f6cda2f
+Revises: f985a0de1b05
+Create Date: 2026-10-18 05:53:20.544453
+
+"""
+from typing import Sequence, Union
+from datetime import datetime
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'd63e2f6cda2f'
+down_revision: Union[str, Sequence[str], None] = 'f985a0de1b05'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+enrollment_status = sa.Enum('ACTIVE', 'PENDING', 'INACTIVE', name='enrollmentstatus')
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    enrollment = op.create_table('studentenrollment',
+    sa.Column('student_id', sa.Integer(), nullable=False),
+    sa.Column('admission_id', sa.Integer(), nullable=True),
+    sa.Column('status', enrollment_status, nullable=False),
+    sa.Column('class_id', sa.Integer(), nullable=True),
+    sa.Column('stream_id', sa.Integer(), nullable=True),
+    sa.Column('academic_year_id', sa.Integer(), nullable=True),
+    sa.Column('pending_admission_id', sa.Integer(), nullable=True),
+    sa.Column('updated_at', sa.DateTime(), nullable=True),
+    sa.ForeignKeyConstraint(['student_id'], ['student.id'], ondelete='CASCADE'),
+    sa.ForeignKeyConstraint(['admission_id'], ['admission.id'], ),
+    sa.ForeignKeyConstraint(['class_id'], ['classroom.id'], ),
+    sa.ForeignKeyConstraint(['stream_id'], ['stream.id'], ),
+    sa.ForeignKeyConstraint(['academic_year_id'], ['academicyear.id'], ),
+    sa.PrimaryKeyConstraint('student_id')
+    )
+    op.create_index('ix_studentenrollment_class_id_status', 'studentenrollment', ['class_id', 'status'], unique=False)
+    op.create_index('ix_studentenrollment_academic_year_id_status', 'studentenrollment', ['academic_year_id', 'status'], unique=False)
+    op.create_index('ix_studentenrollment_status', 'studentenrollment', ['status'], unique=False)
+
+    # Backfill one row per existing student, mirroring StudentService.refresh_enrollment
+    conn = op.get_bind()
+    admissions = {}
+    for row in conn.execute(sa.text(
+        "SELECT id, student_id, status, class_id, stream_id, academic_year_id, created_at "
+        "FROM admission ORDER BY id"
+    )):
+        admissions.setdefault(row.student_id, []).append(row)
+
+    now = datetime.utcnow()
+    rows = []
+    for (student_id,) in conn.execute(sa.text("SELECT id FROM student")):
+        student_admissions = admissions.get(student_id, [])
+        approved = [a for a in student_admissions if a.status == 'APPROVED']
+        pending = [a for a in student_admissions if a.status == 'PENDING']
+        latest_approved = max(approved, key=lambda a: a.created_at or datetime.min, default=None)
+        latest_pending = max(pending, key=lambda a: a.created_at or datetime.min, default=None)
+        current = latest_approved or latest_pending
+        rows.append({
+            'student_id': student_id,
+            'admission_id': current.id if current else None,
+            'status': 'ACTIVE' if latest_approved else 'PENDING' if latest_pending else 'INACTIVE',
+            'class_id': current.class_id if current else None,
+            'stream_id': current.stream_id if current else None,
+            'academic_year_id': current.academic_year_id if current else None,
+            'pending_admission_id': pending[0].id if pending else None,
+            'updated_at': now,
+        })
+    if rows:
+        op.bulk_insert(enrollment, rows)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index('ix_studentenrollment_status', table_name='studentenrollment')
+    op.drop_index('ix_studentenrollment_academic_year_id_status', table_name='studentenrollment')
+    op.drop_index('ix_studentenrollment_class_id_status', table_name='studentenrollment')
+    op.drop_table('studentenrollment')
+    enrollment_status.drop(op.get_bind(), checkfirst=True)
@@ -0,0 +1,28 @@
+"""index studentaccount student_id
+
+Revision ID: ec1a8e60c550
+Revises: 7ffd64fb3d8a
+Create Date: 2026-10-18 06:07:44.242147
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'ec1a8e60c550'
+down_revision: Union[str, Sequence[str], None] = '7ffd64fb3d8a'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.create_index(op.f('ix_studentaccount_student_id'), 'studentaccount', ['student_id'], unique=False)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_studentaccount_student_id'), table_name='studentaccount')
@@ -0,0 +1,30 @@
+"""make evoucher reserved_session_id unique
+
+Revision ID: f985a0de1b05
+Revises: b665f200e665
+Create Date: 2026-10-18 05:50:47.629156
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = 'f985a0de1b05'
+down_revision: Union[str, Sequence[str], None] = 'b665f200e665'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    op.drop_index(op.f('ix_evoucher_reserved_session_id'), table_name='evoucher')
+    op.create_index(op.f('ix_evoucher_reserved_session_id'), 'evoucher', ['reserved_session_id'], unique=True)
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_index(op.f('ix_evoucher_reserved_session_id'), table_name='evoucher')
+    op.create_index(op.f('ix_evoucher_reserved_session_id'), 'evoucher', ['reserved_session_id'], unique=False)
@@ -1,5 +1,15 @@
+import atexit
+import copy
+import json
 import logging
+import logging.handlers
+import queue
+import random
 import sys
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from typing import Optional
+from app.core.config import settings
 
 # Configure logging
 logging.basicConfig(
@@ -8,4 +18,110 @@ logging.basicConfig(
     handlers=[logging.StreamHandler(sys.stdout)]
 )
 
+# Set per request by the request-context middleware; "-" outside a request
+request_id_var: ContextVar[str] = ContextVar("request_id", default="-")
+
+# Attributes every LogRecord has; anything else was passed via `extra=` and is emitted as a field
+_RECORD_ATTRS = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "sample_rate"}
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: timestamp, level, logger, request id, message and any extras."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "request_id": getattr(record, "request_id", "-"),
+            "message": record.getMessage(),
+        }
+        for key, value in record.__dict__.items():
+            if key not in _RECORD_ATTRS:
+                entry[key] = value
+        if record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+class RequestContextFilter(logging.Filter):
+    """
+    Stamps the current request id on each record and applies sampling: records
+    logged with `extra={"sample_rate": r}` are kept with probability r. Warnings
+    and errors are always kept.
+    """
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        rate = getattr(record, "sample_rate", None)
+        if rate is not None and record.levelno < logging.WARNING and random.random() >= rate:
+            return False
+        record.request_id = request_id_var.get()
+        return True
+
+_traceback_formatter = logging.Formatter()
+
+class DroppingQueueHandler(logging.handlers.QueueHandler):
+    """Enqueues records without blocking; when the queue is full the record is dropped and counted."""
+    dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback now, while args and frames are still current
+        record = copy.copy(record)
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = _traceback_formatter.formatException(record.exc_info)
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord) -> None:
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+def _build_listener(logger: logging.Logger) -> logging.handlers.QueueListener:
+    """
+    Route `logger` through a bounded queue: request threads only format the message
+    and enqueue it, while a background thread does the (possibly blocking) write.
+    """
+    output = logging.StreamHandler(sys.stdout)
+    if settings.LOG_FORMAT == "json":
+        output.setFormatter(JsonFormatter())
+    else:
+        output.setFormatter(logging.Formatter(
+            "%(asctime)s - %(name)s - %(levelname)s - [%(request_id)s] %(message)s"
+        ))
+
+    handler = DroppingQueueHandler(queue.Queue(maxsize=settings.LOG_QUEUE_SIZE))
+    handler.addFilter(RequestContextFilter())
+    logger.handlers = [handler]
+    logger.setLevel(settings.LOG_LEVEL)
+    logger.propagate = False
+
+    listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
 logger = logging.getLogger("cschool")
+_listener: Optional[logging.handlers.QueueListener] = _build_listener(logger)
+_queue_handler: DroppingQueueHandler = logger.handlers[0]
+
+def dropped_log_records() -> int:
+    """Records this worker discarded because the log queue was full."""
+    return _queue_handler.dropped
+
+def shutdown_logging():
+    """
+    Flush queued records and stop the writer thread, then write directly so records
+    logged afterwards (atexit hooks, late shutdown steps) still reach stdout.
+    """
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        for handler in _listener.handlers:
+            handler.addFilter(RequestContextFilter())
+        logger.handlers = list(_listener.handlers)
+        _listener = None
+        if _queue_handler.dropped:
+            logger.warning("Dropped %d log records: queue full", _queue_handler.dropped)
+
+atexit.register(shutdown_logging)
@@ -0,0 +1,111 @@
+import threading
+import time
+from collections import OrderedDict
+from typing import List, Optional, Tuple
+from fastapi import HTTPException, Request, status
+from app.core.config import settings
+
+class RateLimitBackend:
+    """Counter storage for sliding-window limiters."""
+
+    def hit(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        """Count a hit in `window` and return (previous window count, current window count)."""
+        raise NotImplementedError
+
+class LocalRateLimitBackend(RateLimitBackend):
+    """
+    Per-process counters: one small list per key holding [window, current, previous],
+    with least-recently-used keys evicted beyond `max_keys`.
+    """
+
+    def __init__(self, max_keys: int):
+        self._max_keys = max_keys
+        self._counters: "OrderedDict[str, List[int]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def hit(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        with self._lock:
+            counter = self._counters.get(key)
+            if counter is None:
+                counter = [window, 0, 0]
+                self._counters[key] = counter
+            else:
+                self._counters.move_to_end(key)
+            if counter[0] != window:
+                # Roll forward; anything older than the previous window no longer counts
+                counter[2] = counter[1] if counter[0] == window - 1 else 0
+                counter[1] = 0
+                counter[0] = window
+            counter[1] += 1
+            if len(self._counters) > self._max_keys:
+                self._counters.popitem(last=False)
+            return counter[2], counter[1]
+
+class RedisRateLimitBackend(RateLimitBackend):
+    """Shared counters so the limit holds across gunicorn workers."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("RATE_LIMIT_STORAGE_URL is set but the 'redis' package is not installed")
+        self._client = redis.Redis.from_url(url)
+
+    def hit(self, key: str, window: int, window_seconds: int) -> Tuple[int, int]:
+        current_key = f"ratelimit:{key}:{window}"
+        pipe = self._client.pipeline()
+        pipe.incr(current_key)
+        pipe.expire(current_key, window_seconds * 2)
+        pipe.get(f"ratelimit:{key}:{window - 1}")
+        current, _, previous = pipe.execute()
+        return int(previous or 0), int(current)
+
+class SlidingWindowLimiter:
+    """
+    Sliding-window counter: the previous fixed window's count is weighted by how much
+    of it still overlaps the sliding window. Costs one dict lookup per check locally.
+    """
+
+    def __init__(self, name: str, limit: int, window_seconds: int, backend: RateLimitBackend):
+        self.name = name
+        self.limit = limit
+        self.window_seconds = window_seconds
+        self.backend = backend
+
+    def allow(self, key: str) -> bool:
+        now = time.time()
+        window = int(now // self.window_seconds)
+        previous, current = self.backend.hit(f"{self.name}:{key}", window, self.window_seconds)
+        overlap = 1 - (now - window * self.window_seconds) / self.window_seconds
+        return previous * overlap + current <= self.limit
+
+def build_backend() -> RateLimitBackend:
+    if settings.RATE_LIMIT_STORAGE_URL:
+        return RedisRateLimitBackend(settings.RATE_LIMIT_STORAGE_URL)
+    return LocalRateLimitBackend(settings.RATE_LIMIT_MAX_KEYS)
+
+rate_limit_backend = build_backend()
+
+def client_ip(request: Request) -> Optional[str]:
+    """
+    The caller's address for throttling. Behind TRUSTED_PROXY_COUNT reverse proxies
+    it is the X-Forwarded-For entry added by the outermost one; entries further left
+    come from the client and can be forged, so they are ignored.
+    """
+    hops = settings.TRUSTED_PROXY_COUNT
+    if hops > 0:
+        forwarded = [
+            host.strip() for header in request.headers.getlist("x-forwarded-for")
+            for host in header.split(",") if host.strip()
+        ]
+        if len(forwarded) >= hops:
+            return forwarded[-hops]
+    return request.client.host if request.client else None
+
+def enforce(limiter: SlidingWindowLimiter, key: Optional[str]):
+    if key and not limiter.allow(key):
+        raise HTTPException(
+            status_code=status.HTTP_429_TOO_MANY_REQUESTS,
+            detail="Too many attempts. Please try again later.",
+            headers={"Retry-After": str(limiter.window_seconds)}
+        )
@@ -0,0 +1,54 @@
+from typing import List, Sequence, Tuple
+from sqlalchemy import func, or_, case, text
+from sqlalchemy.engine import Connection
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+
+# (index, table, column) of the pg_trgm GIN indexes behind text_search. They are not
+# declared on the models: they need the pg_trgm extension, which create_all can't
+# install. The migration creates them; create_trigram_indexes() does for create_all setups.
+TRIGRAM_INDEXES = [
+    ("ix_student_first_name_trgm", "student", "first_name"),
+    ("ix_student_last_name_trgm", "student", "last_name"),
+    ("ix_student_index_number_trgm", "student", "index_number"),
+    ("ix_evoucher_voucher_number_trgm", "evoucher", "voucher_number"),
+]
+
+def create_trigram_indexes(connection: Connection) -> None:
+    """Enable pg_trgm and create the search indexes if missing (Postgres only)."""
+    if connection.dialect.name != "postgresql":
+        return
+    connection.execute(text("CREATE EXTENSION IF NOT EXISTS pg_trgm"))
+    for name, table, column in TRIGRAM_INDEXES:
+        connection.execute(text(f"CREATE INDEX IF NOT EXISTS {name} ON {table} USING gin ({column} gin_trgm_ops)"))
+
+def _greatest(dialect: str, expressions: List[ColumnElement]) -> ColumnElement:
+    if len(expressions) == 1:
+        return expressions[0]
+    # SQLite's multi-argument max() is the scalar equivalent of GREATEST
+    return func.greatest(*expressions) if dialect == "postgresql" else func.max(*expressions)
+
+def text_search(db: Session, columns: Sequence[ColumnElement], term: str) -> Tuple[ColumnElement, ColumnElement]:
+    """
+    Build a (filter, rank) pair for a free-text search over `columns`.
+
+    On Postgres this matches substrings and pg_trgm fuzzy matches (`%`), both served
+    by the GIN trigram indexes, and ranks prefix matches first, then by best trigram
+    similarity. Elsewhere (SQLite test runs) it falls back to case-insensitive
+    substring matching ranked by prefix match only.
+    """
+    dialect = db.get_bind().dialect.name
+    term = term.strip()
+    prefix_rank = _greatest(dialect, [
+        case((c.istartswith(term, autoescape=True), 1.0), else_=0.0) for c in columns
+    ])
+
+    if dialect == "postgresql":
+        search_filter = or_(*[
+            or_(c.icontains(term, autoescape=True), c.op("%")(term)) for c in columns
+        ])
+        similarity = _greatest(dialect, [func.coalesce(func.similarity(c, term), 0.0) for c in columns])
+        return search_filter, prefix_rank + similarity
+
+    search_filter = or_(*[c.icontains(term, autoescape=True) for c in columns])
+    return search_filter, prefix_rank
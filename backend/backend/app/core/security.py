@@ -1,17 +1,139 @@
 from passlib.context import CryptContext
 from jose import JWTError, jwt
 from datetime import datetime, timedelta
-from typing import Optional
+from typing import Callable, List, Optional, Tuple
+from collections import OrderedDict
+from concurrent.futures import ProcessPoolExecutor
+import hashlib
+import hmac
+import multiprocessing
+import os
+import secrets
+import threading
+import time
 from app.core.config import settings
+from app.core.tokens import token_verifier
 
 pwd_context = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
 
+# Voucher PINs get their own cost policy. Pinning min and max rounds to the configured
+# value makes passlib flag any hash made with a different cost for re-hashing.
+voucher_pin_context = CryptContext(
+    schemes=["pbkdf2_sha256"],
+    pbkdf2_sha256__default_rounds=settings.VOUCHER_PIN_HASH_ROUNDS,
+    pbkdf2_sha256__min_rounds=settings.VOUCHER_PIN_HASH_ROUNDS,
+    pbkdf2_sha256__max_rounds=settings.VOUCHER_PIN_HASH_ROUNDS,
+)
+
+# Below this many passwords the pool start-up/IPC cost outweighs the parallelism
+PARALLEL_HASH_THRESHOLD = 32
+
+_hash_executor: Optional[ProcessPoolExecutor] = None
+
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 
 def get_password_hash(password):
     return pwd_context.hash(password)
 
+_dummy_password_hash: Optional[str] = None
+
+def verify_password_offloaded(plain_password: str, hashed_password: Optional[str]) -> bool:
+    """
+    verify_password run in the hash process pool, so a login burst doesn't pin the
+    worker's CPU. With no hash (unknown user) a dummy hash is checked instead, so
+    the response takes as long as a real failed login and doesn't reveal the miss.
+    """
+    global _dummy_password_hash
+    valid_user = hashed_password is not None
+    if not valid_user:
+        if _dummy_password_hash is None:
+            _dummy_password_hash = get_password_hash(secrets.token_urlsafe(16))
+        hashed_password = _dummy_password_hash
+
+    if settings.PASSWORD_VERIFY_IN_POOL and hash_worker_count() > 1:
+        valid = get_hash_executor().submit(verify_password, plain_password, hashed_password).result()
+    else:
+        valid = verify_password(plain_password, hashed_password)
+    return valid and valid_user
+
+def hash_worker_count() -> int:
+    # Every gunicorn worker has its own pool, so by default they split the CPUs between them
+    return settings.PASSWORD_HASH_WORKERS or max(1, (os.cpu_count() or 1) // max(1, settings.WEB_CONCURRENCY))
+
+def get_hash_executor() -> ProcessPoolExecutor:
+    # Created lazily so gunicorn workers that never bulk-hash don't fork a pool
+    global _hash_executor
+    if _hash_executor is None:
+        # Not fork: the worker already runs threads (attempt-log sink, reaper, log writer),
+        # and a forked child can inherit one of their locks held and deadlock on it
+        start_method = "forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn"
+        _hash_executor = ProcessPoolExecutor(
+            max_workers=hash_worker_count(), mp_context=multiprocessing.get_context(start_method)
+        )
+    return _hash_executor
+
+def shutdown_hash_executor():
+    global _hash_executor
+    if _hash_executor is not None:
+        _hash_executor.shutdown(wait=True, cancel_futures=True)
+        _hash_executor = None
+
+def hash_passwords(passwords: List[str], hasher: Callable[[str], str] = get_password_hash) -> List[str]:
+    """Hash many passwords across the process pool, preserving input order."""
+    workers = hash_worker_count()
+    if workers < 2 or len(passwords) < PARALLEL_HASH_THRESHOLD:
+        return [hasher(p) for p in passwords]
+    chunksize = max(1, len(passwords) // (workers * 4))
+    return list(get_hash_executor().map(hasher, passwords, chunksize=chunksize))
+
+# --- Voucher PINs ---
+
+_verified_pins: "OrderedDict[bytes, None]" = OrderedDict()
+_verified_pins_lock = threading.Lock()
+
+def get_voucher_pin_hash(pin: str) -> str:
+    return voucher_pin_context.hash(pin)
+
+def hash_voucher_pins(pins: List[str]) -> List[str]:
+    return hash_passwords(pins, hasher=get_voucher_pin_hash)
+
+def _verify_voucher_pin_and_update(pin: str, pin_hash: str) -> Tuple[bool, Optional[str]]:
+    return voucher_pin_context.verify_and_update(pin, pin_hash)
+
+def _pin_cache_key(pin: str, pin_hash: str) -> bytes:
+    # Keyed digest so the cache never holds anything a PIN could be read back from cheaply
+    return hmac.new(settings.SECRET_KEY.encode(), f"{pin_hash}:{pin}".encode(), hashlib.sha256).digest()
+
+def verify_voucher_pin(pin: str, pin_hash: str) -> Tuple[bool, Optional[str]]:
+    """
+    Verify a voucher PIN. Returns (valid, new_hash); new_hash is set when the stored
+    hash was made with a different cost and should be replaced.
+
+    The hash runs in the process pool so it doesn't hold a request thread's CPU, and
+    successful (pin, hash) pairs are remembered in a small LRU so a repeated verify
+    of the same voucher skips the hash entirely.
+    """
+    cache_key = _pin_cache_key(pin, pin_hash) if settings.VOUCHER_PIN_CACHE_SIZE else None
+    if cache_key is not None:
+        with _verified_pins_lock:
+            if cache_key in _verified_pins:
+                _verified_pins.move_to_end(cache_key)
+                return True, None
+
+    if settings.VOUCHER_PIN_VERIFY_IN_POOL and hash_worker_count() > 1:
+        valid, new_hash = get_hash_executor().submit(_verify_voucher_pin_and_update, pin, pin_hash).result()
+    else:
+        valid, new_hash = _verify_voucher_pin_and_update(pin, pin_hash)
+
+    # Legacy hashes are about to be replaced, so only cache current ones
+    if valid and new_hash is None and cache_key is not None:
+        with _verified_pins_lock:
+            _verified_pins[cache_key] = None
+            if len(_verified_pins) > settings.VOUCHER_PIN_CACHE_SIZE:
+                _verified_pins.popitem(last=False)
+    return valid, new_hash
+
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
     if expires_delta:
@@ -19,5 +141,18 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     else:
         expire = datetime.utcnow() + timedelta(minutes=settings.ACCESS_TOKEN_EXPIRE_MINUTES)
     to_encode.update({"exp": expire})
-    encoded_jwt = jwt.encode(to_encode, settings.SECRET_KEY, algorithm=settings.ALGORITHM)
+    encoded_jwt = token_verifier.encode(to_encode)
     return encoded_jwt
+
+def refresh_token_lifetime() -> timedelta:
+    return timedelta(days=settings.REFRESH_TOKEN_EXPIRE_DAYS)
+
+def create_refresh_token(data: dict) -> str:
+    """A long-lived, single-use token identified by a random `jti`; `iat` keeps sub-second precision."""
+    to_encode = data.copy()
+    to_encode.update({
+        "jti": secrets.token_urlsafe(16),
+        "iat": time.time(),
+        "exp": datetime.utcnow() + refresh_token_lifetime(),
+    })
+    return token_verifier.encode(to_encode)
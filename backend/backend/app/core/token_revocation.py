@@ -0,0 +1,122 @@
+import threading
+import time
+from typing import Dict, Optional, Tuple
+from app.core.config import settings
+from app.core.logging import logger
+
+class RevocationBackend:
+    """
+    Storage for token revocation entries. Every entry carries a TTL matching the
+    lifetime of the tokens it can affect, so the store only ever holds live state.
+    """
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool:
+        """Set `key` only if it is absent; returns whether it was set."""
+        raise NotImplementedError
+
+class LocalRevocationBackend(RevocationBackend):
+    """
+    Process-local store. Entries are never evicted early (that would un-revoke a
+    token); expired ones are swept once the store has grown by `sweep_every` keys.
+    """
+
+    def __init__(self, sweep_every: int = 1024):
+        self._entries: Dict[str, Tuple[float, str]] = {}
+        self._sweep_at = sweep_every
+        self._sweep_every = sweep_every
+        self._lock = threading.Lock()
+
+    def _live(self, key: str, now: float) -> Optional[str]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        if entry[0] <= now:
+            del self._entries[key]
+            return None
+        return entry[1]
+
+    def _sweep(self, now: float) -> None:
+        if len(self._entries) < self._sweep_at:
+            return
+        for key in [k for k, (expires, _) in self._entries.items() if expires <= now]:
+            del self._entries[key]
+        self._sweep_at = len(self._entries) + self._sweep_every
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            return self._live(key, time.monotonic())
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        now = time.monotonic()
+        with self._lock:
+            self._entries[key] = (now + ttl_seconds, value)
+            self._sweep(now)
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool:
+        now = time.monotonic()
+        with self._lock:
+            if self._live(key, now) is not None:
+                return False
+            self._entries[key] = (now + ttl_seconds, value)
+            self._sweep(now)
+            return True
+
+class RedisRevocationBackend(RevocationBackend):
+    """Shared store so a rotation or revocation is seen by every gunicorn worker."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("TOKEN_REVOCATION_URL is set but the 'redis' package is not installed")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._client.set(key, value, px=max(int(ttl_seconds * 1000), 1))
+
+    def add(self, key: str, value: str, ttl_seconds: float) -> bool:
+        return bool(self._client.set(key, value, px=max(int(ttl_seconds * 1000), 1), nx=True))
+
+class RevocationStore:
+    """
+    Revocation state for refresh tokens, kept compact:
+    - one entry per *used* refresh token id, so each token can be rotated only once;
+    - one entry per revoked token family (a login and all its rotations).
+    Per-student cut-offs (password changes) live on StudentAccount.tokens_valid_after.
+    """
+    KEY_PREFIX = "revoked:"
+
+    def __init__(self, backend: RevocationBackend):
+        self.backend = backend
+
+    def mark_used(self, jti: str, ttl_seconds: float) -> bool:
+        """Record that a refresh token was spent; False if it already had been (replay)."""
+        return self.backend.add(f"{self.KEY_PREFIX}jti:{jti}", "1", max(ttl_seconds, 1))
+
+    def revoke_family(self, family: str, ttl_seconds: float) -> None:
+        self.backend.set(f"{self.KEY_PREFIX}fam:{family}", "1", max(ttl_seconds, 1))
+
+    def family_revoked(self, family: str) -> bool:
+        return self.backend.get(f"{self.KEY_PREFIX}fam:{family}") is not None
+
+def build_backend() -> RevocationBackend:
+    if settings.TOKEN_REVOCATION_URL:
+        return RedisRevocationBackend(settings.TOKEN_REVOCATION_URL)
+    if settings.WEB_CONCURRENCY > 1:
+        logger.warning(
+            "TOKEN_REVOCATION_URL is unset with %d workers: refresh-token replay detection "
+            "is per worker, so a copied token can be spent once in each", settings.WEB_CONCURRENCY
+        )
+    return LocalRevocationBackend()
+
+revocation_store = RevocationStore(build_backend())
@@ -0,0 +1,102 @@
+import calendar
+import hashlib
+import threading
+import time
+from collections import OrderedDict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from jose import jwt, JWTError
+from app.core.config import settings
+
+def _read_key(path: str) -> str:
+    with open(path) as f:
+        return f.read()
+
+class TokenKeys:
+    """
+    Signing and verification keys for JWTs. HS* algorithms use SECRET_KEY, as before.
+    RS*/ES* sign with JWT_PRIVATE_KEY_PATH under the `kid` JWT_KEY_ID and verify
+    against JWT_VERIFY_KEYS (kid -> public key path). To rotate keys, publish the new
+    public key, switch the signer, then drop the old kid once its tokens have expired.
+    A verify-only service needs just the public keys.
+    """
+
+    def __init__(self, algorithm: str, secret: str, key_id: Optional[str],
+                 private_key_path: Optional[str], verify_key_paths: Dict[str, str]):
+        self.algorithm = algorithm
+        self.symmetric = algorithm.startswith("HS")
+        self.key_id = key_id
+        self._secret = secret
+        self._private_key = _read_key(private_key_path) if private_key_path and not self.symmetric else None
+        self._verify_keys = {kid: _read_key(path) for kid, path in verify_key_paths.items()}
+
+    def signing_key(self) -> Tuple[str, Optional[dict]]:
+        if self.symmetric:
+            return self._secret, None
+        if self._private_key is None:
+            raise RuntimeError(f"{self.algorithm} signing requires JWT_PRIVATE_KEY_PATH")
+        return self._private_key, {"kid": self.key_id} if self.key_id else None
+
+    def verification_key(self, token: str) -> str:
+        if self.symmetric:
+            return self._secret
+        kid = jwt.get_unverified_header(token).get("kid")
+        key = self._verify_keys.get(kid) if kid else None
+        if key is None:
+            raise JWTError("Unknown signing key")
+        return key
+
+class TokenVerifier:
+    """
+    Verifies and decodes JWTs, remembering the claims of tokens it has already
+    verified until they expire. Entries are keyed by a digest of the token, so a
+    repeat request costs one hash and a dict lookup instead of a signature check.
+    """
+
+    def __init__(self, keys: TokenKeys, maxsize: int):
+        self.keys = keys
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[bytes, Tuple[float, dict]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def encode(self, claims: dict) -> str:
+        key, headers = self.keys.signing_key()
+        return jwt.encode(claims, key, algorithm=self.keys.algorithm, headers=headers)
+
+    def decode(self, token: str, cache: bool = True) -> dict:
+        """
+        Like jwt.decode: raises JWTError (incl. ExpiredSignatureError) for unusable tokens.
+        `cache=False` always checks the signature and leaves the cache untouched, for
+        single-use tokens that gain nothing from it.
+        """
+        if not cache or self._maxsize <= 0:
+            return jwt.decode(token, self.keys.verification_key(token), algorithms=[self.keys.algorithm])
+
+        digest = hashlib.sha256(token.encode()).digest()
+        with self._lock:
+            entry = self._entries.get(digest)
+            if entry is not None:
+                if entry[0] > time.time():
+                    self._entries.move_to_end(digest)
+                    return dict(entry[1])
+                del self._entries[digest]
+
+        claims = jwt.decode(
+            token, self.keys.verification_key(token), algorithms=[self.keys.algorithm]
+        )
+        exp = claims.get("exp")
+        if exp is not None:
+            if isinstance(exp, datetime):
+                exp = calendar.timegm(exp.utctimetuple())
+            with self._lock:
+                self._entries[digest] = (float(exp), claims)
+                self._entries.move_to_end(digest)
+                while len(self._entries) > self._maxsize:
+                    self._entries.popitem(last=False)
+        return dict(claims)
+
+token_keys = TokenKeys(
+    settings.ALGORITHM, settings.SECRET_KEY, settings.JWT_KEY_ID,
+    settings.JWT_PRIVATE_KEY_PATH, settings.JWT_VERIFY_KEYS
+)
+token_verifier = TokenVerifier(token_keys, settings.JWT_VERIFY_CACHE_SIZE)
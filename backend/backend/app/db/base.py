@@ -4,6 +4,6 @@ from app.shared.models.role import Role # noqa
 from app.shared.models.school import School # noqa
 from app.modules.academics.models import AcademicYear, Term, ClassRoom, Stream # noqa
 from app.modules.evoucher.models import EVoucher, VoucherAttemptLog # noqa
-from app.modules.students.models import Student, Guardian, StudentMedical, StudentAccount # noqa
-from app.modules.admissions.models import Admission # noqa
+from app.modules.students.models import Student, Guardian, StudentMedical, StudentAccount, StudentEnrollment # noqa
+from app.modules.admissions.models import Admission, IndexNumberSequence # noqa
 from app.shared.models.audit import AuditLog # noqa
@@ -0,0 +1,92 @@
+import threading
+import time
+from typing import Dict, List, Optional
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, Pool, QueuePool
+
+class PoolMetrics:
+    """Checkout wait times and saturation for one connection pool, in this worker."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.checkouts = 0
+        self.timeouts = 0
+        self.total_wait = 0.0
+        self.max_wait = 0.0
+        self.peak_checked_out = 0
+        self._lock = threading.Lock()
+
+    def record(self, waited: float, checked_out: int, timed_out: bool = False):
+        with self._lock:
+            if timed_out:
+                self.timeouts += 1
+                return
+            self.checkouts += 1
+            self.total_wait += waited
+            self.max_wait = max(self.max_wait, waited)
+            self.peak_checked_out = max(self.peak_checked_out, checked_out)
+
+    def snapshot(self, pool: Pool) -> dict:
+        data = {"name": self.name, "pool": pool.__class__.__name__}
+        with self._lock:
+            data.update({
+                "checkouts": self.checkouts,
+                "timeouts": self.timeouts,
+                "avg_wait_ms": round(self.total_wait / self.checkouts * 1000, 3) if self.checkouts else 0.0,
+                "max_wait_ms": round(self.max_wait * 1000, 3),
+            })
+        if isinstance(pool, QueuePool):
+            capacity = pool.size() + max(pool._max_overflow, 0)
+            data.update({
+                "size": pool.size(),
+                "max_overflow": pool._max_overflow,
+                "checked_out": pool.checkedout(),
+                "saturation": round(pool.checkedout() / capacity, 3) if capacity else None,
+                "peak_saturation": round(self.peak_checked_out / capacity, 3) if capacity else None,
+            })
+        return data
+
+class TimedPoolMixin:
+    """Times how long each checkout waits for a free connection (pool exhaustion)."""
+    metrics: Optional[PoolMetrics] = None
+
+    def _do_get(self):
+        started = time.perf_counter()
+        try:
+            connection = super()._do_get()
+        except exc.TimeoutError:
+            if self.metrics is not None:
+                self.metrics.record(time.perf_counter() - started, 0, timed_out=True)
+            raise
+        if self.metrics is not None:
+            self.metrics.record(time.perf_counter() - started, self.checkedout())
+        return connection
+
+    def recreate(self):
+        # dispose() swaps in a fresh pool; keep reporting into the same metrics
+        pool = super().recreate()
+        pool.metrics = self.metrics
+        return pool
+
+class TimedQueuePool(TimedPoolMixin, QueuePool):
+    pass
+
+class TimedAsyncAdaptedQueuePool(TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+_registered: Dict[str, object] = {}
+
+def instrument(engine, name: str):
+    """Start collecting metrics for `engine` if it uses one of the timed pools."""
+    pool = engine.pool
+    if isinstance(pool, TimedPoolMixin):
+        pool.metrics = PoolMetrics(name)
+    _registered[name] = engine
+
+def pool_report() -> List[dict]:
+    report = []
+    for name, engine in _registered.items():
+        pool = engine.pool
+        metrics = getattr(pool, "metrics", None) or PoolMetrics(name)
+        report.append(metrics.snapshot(pool))
+    return report
@@ -0,0 +1,61 @@
+import threading
+import time
+from typing import Optional
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+from app.core.logging import logger
+
+# Seconds the replica is behind the primary; 0 when it has replayed everything it received
+POSTGRES_REPLICA_LAG = text("""
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+""")
+
+class ReplicaMonitor:
+    """
+    Decides whether reads may go to the replica. Replication lag is measured at most
+    once per `check_interval` seconds per worker; a replica that is too far behind or
+    unreachable is skipped until the next check, so reads fall back to the primary.
+    """
+
+    def __init__(self, engine: Engine, max_lag: float, check_interval: float):
+        self.engine = engine
+        self.max_lag = max_lag
+        self.check_interval = check_interval
+        self.last_lag: Optional[float] = None
+        self._healthy = False
+        self._checked_at = float("-inf")
+        self._lock = threading.Lock()
+
+    def measure_lag(self) -> float:
+        with self.engine.connect() as conn:
+            if conn.dialect.name != "postgresql":
+                # Stand-in replicas (e.g. a SQLite file in local runs) have no lag to report
+                return 0.0
+            return float(conn.execute(POSTGRES_REPLICA_LAG).scalar() or 0.0)
+
+    def healthy(self) -> bool:
+        now = time.monotonic()
+        if now - self._checked_at < self.check_interval:
+            return self._healthy
+        # One request re-checks; the rest keep using the previous answer meanwhile
+        if not self._lock.acquire(blocking=False):
+            return self._healthy
+        try:
+            try:
+                self.last_lag = self.measure_lag()
+                healthy = self.last_lag <= self.max_lag
+                if not healthy:
+                    logger.warning("Replica lag %.1fs exceeds %.1fs; reading from primary", self.last_lag, self.max_lag)
+            except Exception:
+                logger.warning("Replica unreachable; reading from primary", exc_info=True)
+                self.last_lag = None
+                healthy = False
+            self._healthy = healthy
+            self._checked_at = time.monotonic()
+            return healthy
+        finally:
+            self._lock.release()
@@ -1,13 +1,117 @@
-from sqlalchemy import create_engine
+from sqlalchemy import create_engine, event
+from sqlalchemy.exc import InvalidRequestError
 from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import NullPool
 from app.core.config import settings
+from app.db.pool_metrics import TimedAsyncAdaptedQueuePool, TimedQueuePool, instrument
+from app.db.replica import ReplicaMonitor
 
-engine = create_engine(settings.sqlalchemy_database_uri, pool_pre_ping=True)
+def engine_options(is_async: bool = False, url: str = None) -> dict:
+    """Pool configuration shared by the sync and async engines."""
+    options = {"pool_pre_ping": settings.DB_POOL_PRE_PING}
+    if settings.DB_PGBOUNCER:
+        # PgBouncer owns the pooling; holding idle connections here would pin server slots
+        options["poolclass"] = NullPool
+        if is_async:
+            # Transaction pooling can hand each statement a different server connection,
+            # so asyncpg must not rely on named prepared statements
+            options["connect_args"] = {"statement_cache_size": 0, "prepared_statement_cache_size": 0}
+        return options
+    if (url or settings.sqlalchemy_database_uri).startswith("sqlite"):
+        # SQLite (local runs) keeps SQLAlchemy's default pool for its driver
+        return options
+    # The replica is a separate server with its own connection limit, so its one
+    # engine gets the whole per-worker share
+    pool_size, max_overflow = settings.db_pool_limits if url is None else settings.pool_limits()
+    options.update(
+        poolclass=TimedAsyncAdaptedQueuePool if is_async else TimedQueuePool,
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=settings.DB_POOL_TIMEOUT_SECONDS,
+        pool_recycle=settings.DB_POOL_RECYCLE_SECONDS,
+    )
+    return options
+
+engine = create_engine(settings.sqlalchemy_database_uri, **engine_options())
+instrument(engine, "primary")
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
 
+def read_only(bind):
+    """Reject writes on read sessions; Postgres enforces it per transaction."""
+    if bind.dialect.name == "postgresql":
+        return bind.execution_options(postgresql_readonly=True)
+    return bind
+
+def _reject_flush(session, flush_context, instances):
+    raise InvalidRequestError("Read-only session: writes must use SessionLocal")
+
+def _reject_dml(orm_execute_state):
+    if orm_execute_state.is_insert or orm_execute_state.is_update or orm_execute_state.is_delete:
+        raise InvalidRequestError("Read-only session: writes must use SessionLocal")
+
+def read_sessionmaker(bind) -> sessionmaker:
+    """
+    Session factory for reads. Postgres rejects writes in the read-only transaction;
+    other dialects (a SQLite stand-in replica) get the same guarantee from the session.
+    """
+    factory = sessionmaker(autocommit=False, autoflush=False, bind=read_only(bind))
+    if bind.dialect.name != "postgresql":
+        event.listen(factory, "before_flush", _reject_flush)
+        event.listen(factory, "do_orm_execute", _reject_dml)
+    return factory
+
+def replica_engine_options(url: str) -> dict:
+    options = engine_options(url=url)
+    if url.startswith("postgresql"):
+        # Lag checks connect on a request thread; an unreachable replica must fail
+        # fast so the request falls back to the primary instead of hanging
+        options.setdefault("connect_args", {})["connect_timeout"] = settings.REPLICA_CONNECT_TIMEOUT_SECONDS
+    return options
+
+# Optional replica for heavy reads; falls back to the primary when lagging or down
+replica_engine = None
+replica_monitor = None
+ReplicaSessionLocal = None
+if settings.replica_database_uri:
+    replica_engine = create_engine(settings.replica_database_uri, **replica_engine_options(settings.replica_database_uri))
+    instrument(replica_engine, "replica")
+    replica_monitor = ReplicaMonitor(
+        replica_engine, settings.REPLICA_MAX_LAG_SECONDS, settings.REPLICA_LAG_CHECK_INTERVAL_SECONDS
+    )
+    ReplicaSessionLocal = read_sessionmaker(replica_engine)
+PrimaryReadSessionLocal = read_sessionmaker(engine)
+
+def ReadSessionLocal():
+    """A read-only session on the replica when it's healthy, otherwise on the primary."""
+    if replica_monitor is not None and replica_monitor.healthy():
+        return ReplicaSessionLocal()
+    return PrimaryReadSessionLocal()
+
+async_engine = None
+AsyncSessionLocal = None
+if settings.DB_ASYNC:
+    # Imported only when enabled so sync deployments don't need asyncpg/greenlet
+    from sqlalchemy.ext.asyncio import create_async_engine, async_sessionmaker
+
+    async_engine = create_async_engine(settings.async_sqlalchemy_database_uri, **engine_options(is_async=True))
+    instrument(async_engine.sync_engine, "primary-async")
+    AsyncSessionLocal = async_sessionmaker(async_engine, autoflush=False, expire_on_commit=False)
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+def get_read_db():
+    """Dependency for endpoints that only read; may be served by the replica."""
+    db = ReadSessionLocal()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
@@ -1,23 +1,67 @@
+import logging
+import time
+import uuid
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, Depends, Request
 from fastapi.middleware.cors import CORSMiddleware
 from app.core.config import settings
 from app.db import base # noqa
-from app.db.session import get_db
+from app.db.session import get_db, async_engine
+from app.db.pool_metrics import pool_report
 from app.api import api_router
+from app.core.security import shutdown_hash_executor
+from app.core.logging import dropped_log_records, logger, request_id_var, shutdown_logging
+from app.modules.evoucher.attempt_log import attempt_log_sink
+from app.modules.evoucher.reaper import reservation_reaper
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    attempt_log_sink.start()
+    reservation_reaper.start()
+    yield
+    await reservation_reaper.stop()
+    # Flush buffered attempt logs before the worker exits
+    attempt_log_sink.stop()
+    shutdown_hash_executor()
+    if async_engine is not None:
+        await async_engine.dispose()
+    shutdown_logging()
 
 app = FastAPI(
     title=settings.PROJECT_NAME,
-    openapi_url=f"{settings.API_V1_STR}/openapi.json"
+    openapi_url=f"{settings.API_V1_STR}/openapi.json",
+    lifespan=lifespan
 )
 
-# Diagnostic Middleware to log origins
+# Request ids and sampled access logging (origin included for CORS diagnostics)
 @app.middleware("http")
-async def log_origin_middleware(request: Request, call_next):
-    origin = request.headers.get("origin")
-    if origin:
-        print(f"Incoming Request Origin: {origin}")
-    response = await call_next(request)
-    return response
+async def request_context_middleware(request: Request, call_next):
+    request_id = request.headers.get("x-request-id") or uuid.uuid4().hex
+    token = request_id_var.set(request_id)
+    started = time.perf_counter()
+    try:
+        try:
+            response = await call_next(request)
+        except Exception:
+            logger.exception("Unhandled error", extra={"method": request.method, "path": request.url.path})
+            raise
+        response.headers["X-Request-ID"] = request_id
+        logger.log(
+            logging.ERROR if response.status_code >= 500 else logging.INFO,
+            "Request handled",
+            extra={
+                "method": request.method,
+                "path": request.url.path,
+                "status": response.status_code,
+                "duration_ms": round((time.perf_counter() - started) * 1000, 1),
+                "origin": request.headers.get("origin"),
+                "sample_rate": settings.LOG_REQUEST_SAMPLE_RATE,
+            }
+        )
+        return response
+    finally:
+        request_id_var.reset(token)
+
 # Set all CORS enabled origins
 app.add_middleware(
     CORSMiddleware,
@@ -38,6 +82,11 @@ def root():
 def health_check():
     return {"status": "healthy"}
 
+@app.get("/health/db-pool")
+def db_pool_health():
+    """Per-worker connection pool checkout waits and saturation, and log records dropped."""
+    return {"pools": pool_report(), "log_records_dropped": dropped_log_records()}
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=settings.PORT)
@@ -2,7 +2,7 @@ from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
 from typing import List
 from datetime import date
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
 from . import schemas, models
 from app.modules.evoucher.models import EVoucher
 
@@ -26,7 +26,7 @@ def create_academic_year(
 
 @router.get("/", response_model=List[schemas.AcademicYearResponse])
 def list_academic_years(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return db.query(models.AcademicYear).all()
 
@@ -169,7 +169,7 @@ def create_term(
 @router.get("/{year_id}/terms", response_model=List[schemas.TermResponse])
 def list_terms(
     year_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return db.query(models.Term).filter(models.Term.academic_year_id == year_id).order_by(models.Term.sequence).all()
 
@@ -258,7 +258,7 @@ def create_class(
 
 @router.get("/classes", response_model=List[schemas.ClassRoomResponse])
 def list_classes(
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     from sqlalchemy.orm import joinedload
     return db.query(models.ClassRoom).options(joinedload(models.ClassRoom.streams)).all()
@@ -277,7 +277,7 @@ def create_stream(
 @router.get("/classes/{class_id}/streams", response_model=List[schemas.StreamResponse])
 def list_streams(
     class_id: int,
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     return db.query(models.Stream).filter(models.Stream.class_id == class_id).all()
 
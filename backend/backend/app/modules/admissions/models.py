@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum as SqlEnum, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Enum as SqlEnum, ForeignKey, DateTime, Index, PrimaryKeyConstraint
 from sqlalchemy.orm import relationship
 import enum
 from typing import Optional
@@ -31,6 +31,11 @@ class Admission(Base):
     term = relationship("Term")
     voucher = relationship("EVoucher")
 
+    __table_args__ = (
+        # Keyset pagination order for the paged admissions listing
+        Index("ix_admission_created_at_id", "created_at", "id"),
+    )
+
     @property
     def student_name(self) -> str:
         if self.student:
@@ -63,3 +68,13 @@ class Admission(Base):
     @property
     def student_index_number(self) -> Optional[str]:
         return self.student.index_number if self.student else None
+
+class IndexNumberSequence(Base):
+    """Last index number sequence handed out per (level, year), e.g. ("JHS", "26")."""
+    level = Column(String, nullable=False)
+    year = Column(String, nullable=False)
+    last_value = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint("level", "year"),
+    )
@@ -1 +1,185 @@
-# Placeholder for repository.py in admissions module
+import re
+from typing import Iterator, List, Optional, Sequence, Tuple
+from datetime import datetime
+from sqlalchemy import case, func, literal, select, tuple_, update, Row, Select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.orm import Session
+from sqlalchemy.sql.elements import ColumnElement
+from .models import Admission, AdmissionStatus, IndexNumberSequence
+from ..academics.models import AcademicYear, ClassRoom, Stream, Term
+from ..evoucher.models import EVoucher
+from ..students.models import Student
+
+INSERT_BY_DIALECT = {
+    "postgresql": postgresql.insert,
+    "sqlite": sqlite.insert,
+}
+
+# Newest first; (created_at, id) is unique so it doubles as the keyset
+LISTING_ORDER = (Admission.created_at, Admission.id)
+
+class AdmissionsRepository:
+    @staticmethod
+    def _highest_issued_sequence(db: Session, prefix: str) -> int:
+        """Highest sequence already used under `prefix`; only needed when a counter is first created."""
+        pattern = re.compile(rf"^{re.escape(prefix)}(\d+)$")
+        numbers = db.execute(
+            select(Student.index_number).where(Student.index_number.startswith(prefix, autoescape=True))
+        ).scalars()
+        return max((int(m.group(1)) for n in numbers if (m := pattern.match(n))), default=0)
+
+    @staticmethod
+    def allocate_index_sequence(db: Session, level: str, year: str, prefix: str, count: int = 1) -> List[int]:
+        """
+        Atomically reserve `count` consecutive sequence numbers for (level, year) with a
+        single UPDATE ... RETURNING on the counter row. The row stays locked until the
+        caller commits, so concurrent approvals can never receive the same number.
+        """
+        allocate = (
+            update(IndexNumberSequence)
+            .where(IndexNumberSequence.level == level, IndexNumberSequence.year == year)
+            .values(last_value=IndexNumberSequence.last_value + count)
+            .returning(IndexNumberSequence.last_value)
+            .execution_options(synchronize_session=False)
+        )
+        last_value = db.execute(allocate).scalar()
+        if last_value is None:
+            # First allocation for this (level, year): seed the counter past any
+            # numbers issued before counters existed, then allocate again.
+            insert = INSERT_BY_DIALECT[db.get_bind().dialect.name]
+            db.execute(
+                insert(IndexNumberSequence)
+                .values(level=level, year=year, last_value=AdmissionsRepository._highest_issued_sequence(db, prefix))
+                .on_conflict_do_nothing()
+            )
+            last_value = db.execute(allocate).scalar()
+        return list(range(last_value - count + 1, last_value + 1))
+
+    @staticmethod
+    def advance_index_sequence(db: Session, level: str, year: str, issued: int) -> None:
+        """
+        Move the (level, year) counter past `issued` (GREATEST semantics) for numbers
+        written outside the allocator, e.g. by the student importer. A counter that
+        doesn't exist yet needs nothing: it's seeded from existing students when created.
+        """
+        db.execute(
+            update(IndexNumberSequence)
+            .where(IndexNumberSequence.level == level, IndexNumberSequence.year == year)
+            .values(last_value=case(
+                (IndexNumberSequence.last_value < issued, issued),
+                else_=IndexNumberSequence.last_value
+            ))
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def load_for_decision(
+        db: Session,
+        admission_ids: Optional[List[int]] = None,
+        filters: Optional[dict] = None,
+        limit: Optional[int] = None,
+    ) -> Sequence[Row]:
+        """
+        Everything an approve/reject needs for a batch of admissions in one query:
+        ids, status, student/voucher keys, class level, year name and the voucher's
+        session token. Admission rows are locked (Postgres) until the caller commits
+        so two batches can't decide the same admission. With `filters` only PENDING
+        admissions are selected.
+        """
+        query = (
+            select(
+                Admission.id,
+                Admission.status,
+                Admission.student_id,
+                Admission.voucher_id,
+                ClassRoom.level.label("class_level"),
+                AcademicYear.name.label("academic_year_name"),
+                EVoucher.reserved_session_id,
+            )
+            .join(ClassRoom, Admission.class_id == ClassRoom.id)
+            .join(AcademicYear, Admission.academic_year_id == AcademicYear.id)
+            .outerjoin(EVoucher, Admission.voucher_id == EVoucher.id)
+            .order_by(Admission.created_at, Admission.id)
+            .with_for_update(of=Admission)
+        )
+        if admission_ids is not None:
+            query = query.where(Admission.id.in_(admission_ids))
+        else:
+            query = query.where(Admission.status == AdmissionStatus.PENDING)
+            for column, value in (filters or {}).items():
+                if value is not None:
+                    query = query.where(getattr(Admission, column) == value)
+        if limit is not None:
+            query = query.limit(limit)
+        return db.execute(query).all()
+
+    @staticmethod
+    def listing_projection() -> Select:
+        """
+        Only the columns AdmissionResponse needs, from one joined SELECT, instead of
+        loading six relationships per admission.
+        """
+        return (
+            select(
+                Admission.id,
+                Admission.student_id,
+                Admission.academic_year_id,
+                Admission.class_id,
+                Admission.stream_id,
+                Admission.term_id,
+                Admission.voucher_id,
+                Admission.status,
+                Admission.approved_by_admin_id,
+                Admission.approved_at,
+                Admission.created_at,
+                Student.first_name,
+                Student.middle_name,
+                Student.last_name,
+                Student.index_number.label("student_index_number"),
+                EVoucher.voucher_number,
+                ClassRoom.name.label("class_room_name"),
+                Stream.name.label("stream_name"),
+                AcademicYear.name.label("academic_year_name"),
+                Term.name.label("term_name"),
+            )
+            .select_from(Admission)
+            .outerjoin(Student, Admission.student_id == Student.id)
+            .outerjoin(EVoucher, Admission.voucher_id == EVoucher.id)
+            .outerjoin(ClassRoom, Admission.class_id == ClassRoom.id)
+            .outerjoin(Stream, Admission.stream_id == Stream.id)
+            .outerjoin(AcademicYear, Admission.academic_year_id == AcademicYear.id)
+            .outerjoin(Term, Admission.term_id == Term.id)
+        )
+
+    @staticmethod
+    def page_before(
+        db: Session, clauses: List[ColumnElement], before: Optional[Tuple[datetime, int]], size: int
+    ) -> Sequence[Row]:
+        """Seek past the `before` key (newest first) instead of OFFSET-scanning."""
+        query = AdmissionsRepository.listing_projection().where(*clauses)
+        if before is not None:
+            key = tuple_(*(literal(value, column.type) for column, value in zip(LISTING_ORDER, before)))
+            query = query.where(tuple_(*LISTING_ORDER) < key)
+        return db.execute(query.order_by(*(c.desc() for c in LISTING_ORDER)).limit(size)).all()
+
+    @staticmethod
+    def stream_listing(db: Session, clauses: List[ColumnElement], batch_size: int) -> Iterator[Row]:
+        """The whole filtered listing through a server-side cursor, `batch_size` rows per fetch."""
+        query = (
+            AdmissionsRepository.listing_projection()
+            .where(*clauses)
+            .order_by(*(c.desc() for c in LISTING_ORDER))
+            .execution_options(yield_per=batch_size)
+        )
+        yield from db.execute(query)
+
+    @staticmethod
+    def count(db: Session, clauses: List[ColumnElement], search: bool = False) -> int:
+        query = select(func.count(Admission.id)).select_from(Admission).where(*clauses)
+        if search:
+            # Search clauses reference the student and voucher columns
+            query = (
+                query.outerjoin(Student, Admission.student_id == Student.id)
+                .outerjoin(EVoucher, Admission.voucher_id == EVoucher.id)
+            )
+        return db.execute(query).scalar_one()
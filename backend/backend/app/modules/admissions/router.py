@@ -1,14 +1,16 @@
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session, selectinload, aliased
 from typing import List, Optional
-from app.db.session import get_db
+from app.db.session import get_db, get_read_db
+from app.core.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.export import ExportFormat, EXPORT_MEDIA_TYPES, require_format, stream_export
+from app.core.search import text_search
 from . import schemas, service, models
 from .models import Admission, AdmissionStatus
 from app.modules.students.models import Student
 from app.modules.evoucher.models import EVoucher
-from datetime import datetime
-import traceback
-import sys
+from app.core.logging import logger
 
 router = APIRouter()
 
@@ -29,6 +31,37 @@ def create_admission(
         placement_data=obj_in.placement
     )
 
+@router.post("/bulk/approve", response_model=schemas.AdmissionBulkResult)
+def bulk_approve_admissions(
+    obj_in: schemas.AdmissionBulkDecision,
+    admin_id: int = 1, # TODO: Get from auth token
+    db: Session = Depends(get_db)
+):
+    """
+    Approve a list of admissions, or every PENDING admission matching a filter,
+    reporting the outcome for each one.
+    """
+    return service.AdmissionsService.bulk_approve_admissions(
+        db, admin_id,
+        admission_ids=obj_in.admission_ids,
+        filters=obj_in.filter.model_dump() if obj_in.filter else None
+    )
+
+@router.post("/bulk/reject", response_model=schemas.AdmissionBulkResult)
+def bulk_reject_admissions(
+    obj_in: schemas.AdmissionBulkDecision,
+    admin_id: int = 1, # TODO: Get from auth token
+    db: Session = Depends(get_db)
+):
+    """
+    Reject a list of admissions, or every PENDING admission matching a filter.
+    """
+    return service.AdmissionsService.bulk_reject_admissions(
+        db, admin_id,
+        admission_ids=obj_in.admission_ids,
+        filters=obj_in.filter.model_dump() if obj_in.filter else None
+    )
+
 @router.post("/{admission_id}/approve", response_model=schemas.AdmissionResponse)
 def approve_admission(
     admission_id: int,
@@ -47,7 +80,7 @@ def list_admissions(
     academic_year_id: int = Query(None),
     term_id: int = Query(None),
     search: str = Query(None),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
     try:
         # Using an alias 'adm' and selectinload is the SAFEST way to avoid 
@@ -81,22 +114,69 @@ def list_admissions(
         if term_id:
             query = query.filter(adm.term_id == term_id)
         
+        order_by = [adm.created_at.desc()]
         if search:
-            search_filter = f"%{search}%"
-            # Join required for filtering by student name or voucher number
-            query = query.join(adm.student).join(adm.voucher).filter(
-                (Student.first_name.ilike(search_filter)) |
-                (Student.last_name.ilike(search_filter)) |
-                (EVoucher.voucher_number.ilike(search_filter))
+            search_filter, rank = text_search(
+                db, [Student.first_name, Student.last_name, EVoucher.voucher_number], search
             )
+            # Join required for filtering by student name or voucher number
+            query = query.join(adm.student).join(adm.voucher).filter(search_filter)
+            order_by.insert(0, rank.desc())
         
-        return query.order_by(adm.created_at.desc()).all()
+        return query.order_by(*order_by).all()
     except Exception as e:
-        with open("debug_error.log", "a") as f:
-            f.write(f"\n--- Error at {datetime.now()} ---\n")
-            traceback.print_exc(file=f)
+        logger.exception("Listing admissions failed")
         raise HTTPException(status_code=500, detail=str(e))
 
+@router.get("/paged", response_model=schemas.PaginatedAdmissionResponse)
+def list_admissions_paged(
+    status: Optional[str] = Query(None),
+    class_id: int = Query(None),
+    academic_year_id: int = Query(None),
+    term_id: int = Query(None),
+    search: str = Query(None),
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    cursor: Optional[str] = None,
+    include_total: bool = False,
+    db: Session = Depends(get_read_db)
+):
+    """
+    Paged variant of the admissions listing, newest first. Pass `next_cursor` back
+    as `cursor` for the following page; search filters but doesn't re-rank here.
+    """
+    return service.AdmissionsService.list_admissions_page(
+        db, status, class_id, academic_year_id, term_id, search,
+        size=size, cursor=cursor, include_total=include_total
+    )
+
+# Columns of the admissions export, in order
+EXPORT_COLUMNS = [
+    "id", "student_id", "student_name", "student_index_number", "voucher_number",
+    "class_name", "academic_year_name", "term_name", "status",
+    "created_at", "approved_at", "approved_by_admin_id",
+]
+
+@router.get("/export")
+def export_admissions(
+    format: ExportFormat = ExportFormat.CSV,
+    status: Optional[str] = Query(None),
+    class_id: int = Query(None),
+    academic_year_id: int = Query(None),
+    term_id: int = Query(None),
+    search: str = Query(None)
+):
+    """
+    Stream every admission matching the listing filters, newest first.
+    """
+    # TODO: Add admin permission check
+    require_format(format)
+    rows = service.AdmissionsService.export_admissions(status, class_id, academic_year_id, term_id, search)
+    return StreamingResponse(
+        stream_export(rows, EXPORT_COLUMNS, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="admissions.{format.value}"'}
+    )
+
 @router.post("/{admission_id}/reject", response_model=schemas.AdmissionResponse)
 def reject_admission(
     admission_id: int,
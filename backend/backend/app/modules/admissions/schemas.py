@@ -1,6 +1,8 @@
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
 from datetime import datetime
 from typing import Optional, List
+import enum
+from app.core.config import settings
 from .models import AdmissionStatus
 from ..students.schemas import StudentCreate, GuardianCreate, StudentMedicalCreate
 
@@ -45,3 +47,42 @@ class AdmissionResponse(AdmissionBase):
 
     class Config:
         from_attributes = True
+
+class PaginatedAdmissionResponse(BaseModel):
+    items: List[AdmissionResponse]
+    total: Optional[int] = None # only computed when include_total=true
+    size: int
+    next_cursor: Optional[str] = None # pass back as `cursor` to fetch the following page
+
+class AdmissionBulkFilter(BaseModel):
+    academic_year_id: Optional[int] = None
+    class_id: Optional[int] = None
+    term_id: Optional[int] = None
+
+class AdmissionBulkDecision(BaseModel):
+    """Either explicit admission ids, or a filter selecting PENDING admissions."""
+    admission_ids: Optional[List[int]] = Field(None, min_length=1, max_length=settings.ADMISSION_BULK_MAX_COUNT)
+    filter: Optional[AdmissionBulkFilter] = None
+
+    @model_validator(mode="after")
+    def require_ids_or_filter(self):
+        if (self.admission_ids is None) == (self.filter is None):
+            raise ValueError("Provide exactly one of admission_ids or filter")
+        return self
+
+class AdmissionBulkOutcome(str, enum.Enum):
+    APPROVED = "approved"
+    REJECTED = "rejected"
+    NOT_FOUND = "not_found"
+    SKIPPED = "skipped" # already processed
+
+class AdmissionBulkItemResult(BaseModel):
+    admission_id: int
+    outcome: AdmissionBulkOutcome
+    student_index_number: Optional[str] = None
+    detail: Optional[str] = None
+
+class AdmissionBulkResult(BaseModel):
+    processed: int
+    skipped: int
+    results: List[AdmissionBulkItemResult]
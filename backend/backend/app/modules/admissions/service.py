@@ -1,20 +1,179 @@
+from sqlalchemy import insert, update, Row
 from sqlalchemy.orm import Session
+from collections import defaultdict
 from datetime import datetime
-from typing import List, Optional
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
 from fastapi import HTTPException
+import base64
+import json
+import re
 import secrets
 import string
 
 from .models import Admission, AdmissionStatus
+from .repository import AdmissionsRepository
+from app.core.search import text_search
+from .schemas import AdmissionBulkItemResult, AdmissionBulkOutcome, AdmissionBulkResult
 from ..evoucher.models import EVoucher, VoucherStatus
+from ..evoucher.service import EVoucherService
+from ..evoucher.session_cache import voucher_session_cache
 from ..students.models import Student, Guardian, StudentMedical, StudentAccount, Gender
+from ..students.service import StudentService
+from ..students.auth import principal_cache
 from ..academics.models import AcademicYear, ClassRoom, Stream
 from app.shared.models.audit import AuditLog
+from app.core.config import settings
+from app.core.export import EXPORT_BATCH_SIZE
+from app.db.session import ReadSessionLocal
 from app.core.security import get_password_hash
-import traceback
-import sys
+from app.core.logging import logger
+
+def encode_cursor(row: Row) -> str:
+    key = [row.created_at.isoformat(), row.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[datetime, int]:
+    try:
+        created_at, admission_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return datetime.fromisoformat(created_at), int(admission_id)
+    except (ValueError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
+def listing_item(row: Row) -> dict:
+    """AdmissionResponse fields from a listing projection row, named as the model properties do."""
+    item = dict(row._mapping)
+    first_name, middle_name, last_name = item.pop("first_name"), item.pop("middle_name"), item.pop("last_name")
+    class_room_name, stream_name = item.pop("class_room_name"), item.pop("stream_name")
+    if first_name is not None:
+        item["student_name"] = " ".join(p for p in (first_name, middle_name, last_name) if p)
+    else:
+        item["student_name"] = "Unknown"
+    item["class_name"] = class_room_name or "N/A"
+    if stream_name:
+        item["class_name"] += f" ({stream_name})"
+    item["voucher_number"] = item["voucher_number"] or "N/A"
+    item["academic_year_name"] = item["academic_year_name"] or "N/A"
+    item["term_name"] = item["term_name"] or "N/A"
+    return item
+
+def index_number_series(class_level: str, academic_year_name: str) -> Tuple[str, str]:
+    level_code = class_level[:3].upper() # JHS or PRI
+    year_short = academic_year_name.split('/')[0][-2:] # 26
+    return level_code, year_short
+
+# Index numbers handed out by allocate_index_numbers: SCH/{LEVEL}/{YEAR}/{SEQ}
+INDEX_NUMBER_PATTERN = re.compile(r"^SCH/([A-Z]+)/(\d{2})/(\d+)$")
 
 class AdmissionsService:
+    @staticmethod
+    def reserve_index_numbers(db: Session, index_numbers: Iterable[str]) -> None:
+        """
+        Account for index numbers assigned outside the allocator (imports) so it never
+        hands them out again. Numbers outside the SCH/{LEVEL}/{YEAR}/{SEQ} scheme are
+        ignored. Runs in the caller's transaction.
+        """
+        highest: Dict[Tuple[str, str], int] = {}
+        for index_number in index_numbers:
+            match = INDEX_NUMBER_PATTERN.match(index_number or "")
+            if match:
+                level, year, seq = match.group(1), match.group(2), int(match.group(3))
+                highest[(level, year)] = max(highest.get((level, year), 0), seq)
+        for (level, year), seq in highest.items():
+            AdmissionsRepository.advance_index_sequence(db, level, year, seq)
+
+    @staticmethod
+    def allocate_index_numbers(db: Session, class_level: str, academic_year_name: str, count: int = 1) -> List[str]:
+        """
+        Hand out `count` index numbers of the form SCH/{LEVEL}/{YEAR}/{SEQ} from the
+        per-(level, year) counter, in constant time regardless of how many students exist.
+        """
+        level_code, year_short = index_number_series(class_level, academic_year_name)
+        prefix = f"SCH/{level_code}/{year_short}/"
+        sequences = AdmissionsRepository.allocate_index_sequence(db, level_code, year_short, prefix, count)
+        return [f"{prefix}{seq:04d}" for seq in sequences]
+
+    @staticmethod
+    def listing_clauses(
+        db: Session,
+        status: Optional[str],
+        class_id: Optional[int],
+        academic_year_id: Optional[int],
+        term_id: Optional[int],
+        search: Optional[str]
+    ) -> Optional[list]:
+        """WHERE clauses for the listing projection; None when `status` matches nothing."""
+        clauses = []
+        if status:
+            try:
+                clauses.append(Admission.status == AdmissionStatus(status.upper()))
+            except ValueError:
+                return None
+        if class_id:
+            clauses.append(Admission.class_id == class_id)
+        if academic_year_id:
+            clauses.append(Admission.academic_year_id == academic_year_id)
+        if term_id:
+            clauses.append(Admission.term_id == term_id)
+        if search:
+            search_filter, _ = text_search(
+                db, [Student.first_name, Student.last_name, EVoucher.voucher_number], search
+            )
+            clauses.append(search_filter)
+        return clauses
+
+    @staticmethod
+    def export_admissions(
+        status: Optional[str],
+        class_id: Optional[int],
+        academic_year_id: Optional[int],
+        term_id: Optional[int],
+        search: Optional[str]
+    ) -> Iterator[dict]:
+        """
+        Yield every matching admission, newest first, from a server-side cursor.
+        Owns its session because it keeps running after the request handler returns.
+        """
+        db = ReadSessionLocal()
+        try:
+            clauses = AdmissionsService.listing_clauses(db, status, class_id, academic_year_id, term_id, search)
+            if clauses is None:
+                return
+            for row in AdmissionsRepository.stream_listing(db, clauses, EXPORT_BATCH_SIZE):
+                yield listing_item(row)
+        finally:
+            db.close()
+
+    @staticmethod
+    def list_admissions_page(
+        db: Session,
+        status: Optional[str],
+        class_id: Optional[int],
+        academic_year_id: Optional[int],
+        term_id: Optional[int],
+        search: Optional[str],
+        size: int,
+        cursor: Optional[str] = None,
+        include_total: bool = False
+    ) -> dict:
+        """
+        Newest-first admissions listing from a single projection query, paged by
+        seeking past the (created_at, id) cursor. The total is a separate COUNT and
+        is only run when asked for.
+        """
+        clauses = AdmissionsService.listing_clauses(db, status, class_id, academic_year_id, term_id, search)
+        if clauses is None:
+            return {"items": [], "total": 0 if include_total else None, "size": size, "next_cursor": None}
+
+        rows = AdmissionsRepository.page_before(
+            db, clauses, decode_cursor(cursor) if cursor else None, size
+        )
+        return {
+            "items": [listing_item(row) for row in rows],
+            "total": AdmissionsRepository.count(db, clauses, search=bool(search)) if include_total else None,
+            "size": size,
+            "next_cursor": encode_cursor(rows[-1]) if len(rows) == size else None
+        }
+
     @staticmethod
     def create_pending_admission(
         db: Session,
@@ -24,9 +183,9 @@ class AdmissionsService:
         medical_data: Optional[dict],
         placement_data: dict
     ) -> Admission:
-        # 1. Validate Voucher Session
-        voucher = db.query(EVoucher).filter(EVoucher.reserved_session_id == voucher_session_token).first()
-        if not voucher or voucher.status != VoucherStatus.RESERVED:
+        # 1. Validate Voucher Session (locked against release/re-claim until commit)
+        voucher = EVoucherService.lock_session(db, voucher_session_token)
+        if not voucher:
             raise HTTPException(status_code=400, detail="Invalid or expired voucher session")
         
         # 2. Check if voucher matches academic year
@@ -99,6 +258,7 @@ class AdmissionsService:
             )
             db.add(admission)
             db.flush()
+            StudentService.refresh_enrollment(db, student.id)
 
             # 8. Log Action
             audit = AuditLog(
@@ -119,8 +279,7 @@ class AdmissionsService:
 
         except Exception as e:
             db.rollback()
-            print(f"DEBUG: Admission creation failed: {e}", file=sys.stderr)
-            traceback.print_exc()
+            logger.exception("Admission creation failed")
             raise HTTPException(status_code=500, detail=f"Failed to create admission: {str(e)}")
 
     @staticmethod
@@ -140,6 +299,7 @@ class AdmissionsService:
 
             # 2. Mark Voucher as Used
             voucher = admission.voucher
+            session_token = voucher.reserved_session_id
             voucher.status = VoucherStatus.USED
             voucher.used_at = datetime.utcnow()
             voucher.used_by_student_id = admission.student_id
@@ -149,19 +309,11 @@ class AdmissionsService:
                 admission.student.account.is_active = True
 
             # 4. Generate Index Number (Format: SCH/{LEVEL}/{YEAR}/{SEQ})
-            # LEVEL: From ClassRoom
-            # YEAR: From AcademicYear (name part, e.g., 2026)
-            level_code = admission.class_room.level[:3].upper() # JHS or PRI
-            year_short = admission.academic_year.name.split('/')[0][-2:] # 26
-            
-            # Simple sequence based on count in same year/level
-            seq_count = db.query(Student).join(Admission).filter(
-                Admission.academic_year_id == admission.academic_year_id,
-                Admission.status == AdmissionStatus.APPROVED
-            ).count()
-            
-            index_number = f"SCH/{level_code}/{year_short}/{seq_count + 1:04d}"
+            index_number = AdmissionsService.allocate_index_numbers(
+                db, admission.class_room.level, admission.academic_year.name
+            )[0]
             admission.student.index_number = index_number
+            StudentService.refresh_enrollment(db, admission.student_id)
 
             # 5. Log Action
             audit = AuditLog(
@@ -174,6 +326,8 @@ class AdmissionsService:
             db.add(audit)
 
             db.commit()
+            voucher_session_cache.invalidate(session_token)
+            principal_cache.invalidate(admission.student_id)
             db.refresh(admission)
             return admission
 
@@ -199,10 +353,12 @@ class AdmissionsService:
             # User said "voucher marked used or invalid based on policy"
             # Let's mark it as UNUSED so the user can try again or someone else can.
             voucher = admission.voucher
+            session_token = voucher.reserved_session_id if voucher else None
             if voucher:
                 voucher.status = VoucherStatus.UNUSED
                 voucher.reserved_at = None
                 voucher.reserved_session_id = None
+            StudentService.refresh_enrollment(db, admission.student_id)
 
             # 3. Log Action
             audit = AuditLog(
@@ -215,9 +371,171 @@ class AdmissionsService:
             db.add(audit)
 
             db.commit()
+            voucher_session_cache.invalidate(session_token)
             db.refresh(admission)
             return admission
 
         except Exception as e:
             db.rollback()
             raise HTTPException(status_code=500, detail=f"Failed to reject admission: {str(e)}")
+
+    @staticmethod
+    def _bulk_targets(
+        db: Session,
+        admission_ids: Optional[List[int]],
+        filters: Optional[dict],
+        allowed: List[AdmissionStatus],
+    ) -> Tuple[list, List[AdmissionBulkItemResult]]:
+        """Load a batch and split it into rows to decide and per-item not_found/skipped results."""
+        if admission_ids is not None:
+            admission_ids = list(dict.fromkeys(admission_ids))
+        rows = AdmissionsRepository.load_for_decision(
+            db, admission_ids, filters, limit=None if admission_ids is not None else settings.ADMISSION_BULK_MAX_COUNT
+        )
+        targets = [row for row in rows if row.status in allowed]
+        results = [
+            AdmissionBulkItemResult(
+                admission_id=row.id, outcome=AdmissionBulkOutcome.SKIPPED,
+                detail=f"Admission is already processed ({row.status.value})"
+            )
+            for row in rows if row.status not in allowed
+        ]
+        if admission_ids is not None:
+            found = {row.id for row in rows}
+            results.extend(
+                AdmissionBulkItemResult(admission_id=i, outcome=AdmissionBulkOutcome.NOT_FOUND, detail="Admission record not found")
+                for i in admission_ids if i not in found
+            )
+        return targets, results
+
+    @staticmethod
+    def bulk_approve_admissions(
+        db: Session, admin_id: int, admission_ids: Optional[List[int]] = None, filters: Optional[dict] = None
+    ) -> AdmissionBulkResult:
+        """
+        Approve many admissions in one transaction with set-based statements: one
+        SELECT for the batch, one index-number block per level/year, then one
+        UPDATE/INSERT per table instead of per admission.
+        """
+        targets, results = AdmissionsService._bulk_targets(
+            db, admission_ids, filters, [AdmissionStatus.PENDING, AdmissionStatus.REJECTED]
+        )
+        if not targets:
+            return AdmissionBulkResult(processed=0, skipped=len(results), results=results)
+
+        try:
+            now = datetime.utcnow()
+
+            # Index numbers, allocated in submission order within each level/year series
+            series: Dict[Tuple[str, str], list] = defaultdict(list)
+            for row in targets:
+                series[index_number_series(row.class_level, row.academic_year_name)].append(row)
+            index_numbers: Dict[int, str] = {}
+            for rows in series.values():
+                numbers = AdmissionsService.allocate_index_numbers(
+                    db, rows[0].class_level, rows[0].academic_year_name, count=len(rows)
+                )
+                index_numbers.update(zip((row.id for row in rows), numbers))
+
+            admission_ids = [row.id for row in targets]
+            student_ids = [row.student_id for row in targets]
+
+            db.execute(
+                update(Admission)
+                .where(Admission.id.in_(admission_ids))
+                .values(status=AdmissionStatus.APPROVED, approved_by_admin_id=admin_id, approved_at=now)
+                .execution_options(synchronize_session=False)
+            )
+            vouchers = [
+                {"id": row.voucher_id, "status": VoucherStatus.USED, "used_at": now, "used_by_student_id": row.student_id}
+                for row in targets if row.voucher_id
+            ]
+            if vouchers:
+                db.execute(update(EVoucher), vouchers)
+            db.execute(
+                update(StudentAccount)
+                .where(StudentAccount.student_id.in_(student_ids))
+                .values(is_active=True)
+                .execution_options(synchronize_session=False)
+            )
+            db.execute(update(Student), [
+                {"id": row.student_id, "index_number": index_numbers[row.id]} for row in targets
+            ])
+            db.execute(insert(AuditLog), [
+                {
+                    "entity": "Admission",
+                    "entity_id": row.id,
+                    "action": "APPROVE",
+                    "admin_id": admin_id,
+                    "notes": f"Admission approved. Generated index: {index_numbers[row.id]}",
+                }
+                for row in targets
+            ])
+            StudentService.refresh_enrollments(db, student_ids)
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to approve admissions: {str(e)}")
+
+        for row in targets:
+            voucher_session_cache.invalidate(row.reserved_session_id)
+        principal_cache.invalidate(*student_ids)
+        results[:0] = [
+            AdmissionBulkItemResult(
+                admission_id=row.id, outcome=AdmissionBulkOutcome.APPROVED, student_index_number=index_numbers[row.id]
+            )
+            for row in targets
+        ]
+        return AdmissionBulkResult(processed=len(targets), skipped=len(results) - len(targets), results=results)
+
+    @staticmethod
+    def bulk_reject_admissions(
+        db: Session, admin_id: int, admission_ids: Optional[List[int]] = None, filters: Optional[dict] = None
+    ) -> AdmissionBulkResult:
+        """Reject many PENDING admissions in one transaction, releasing their vouchers."""
+        targets, results = AdmissionsService._bulk_targets(db, admission_ids, filters, [AdmissionStatus.PENDING])
+        if not targets:
+            return AdmissionBulkResult(processed=0, skipped=len(results), results=results)
+
+        try:
+            admission_ids = [row.id for row in targets]
+            voucher_ids = [row.voucher_id for row in targets if row.voucher_id]
+
+            db.execute(
+                update(Admission)
+                .where(Admission.id.in_(admission_ids))
+                .values(status=AdmissionStatus.REJECTED)
+                .execution_options(synchronize_session=False)
+            )
+            if voucher_ids:
+                db.execute(
+                    update(EVoucher)
+                    .where(EVoucher.id.in_(voucher_ids))
+                    .values(status=VoucherStatus.UNUSED, reserved_at=None, reserved_session_id=None)
+                    .execution_options(synchronize_session=False)
+                )
+            db.execute(insert(AuditLog), [
+                {
+                    "entity": "Admission",
+                    "entity_id": row.id,
+                    "action": "REJECT",
+                    "admin_id": admin_id,
+                    "notes": f"Admission rejected by admin {admin_id}.",
+                }
+                for row in targets
+            ])
+            StudentService.refresh_enrollments(db, [row.student_id for row in targets])
+
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            raise HTTPException(status_code=500, detail=f"Failed to reject admissions: {str(e)}")
+
+        for row in targets:
+            voucher_session_cache.invalidate(row.reserved_session_id)
+        results[:0] = [
+            AdmissionBulkItemResult(admission_id=row.id, outcome=AdmissionBulkOutcome.REJECTED)
+            for row in targets
+        ]
+        return AdmissionBulkResult(processed=len(targets), skipped=len(results) - len(targets), results=results)
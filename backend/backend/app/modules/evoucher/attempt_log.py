@@ -0,0 +1,103 @@
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import List, Optional
+from sqlalchemy import insert
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from .models import VoucherAttemptLog, VoucherAttemptResult
+
+class AttemptLogSink:
+    """
+    Buffers VoucherAttemptLog rows in a bounded in-memory queue and writes them in
+    batched inserts from a background thread, so verification requests don't pay
+    for a second commit. Remaining records are flushed when the sink is stopped.
+    """
+
+    def __init__(self, maxsize: int, batch_size: int, flush_interval: float):
+        self._queue: "queue.Queue[dict]" = queue.Queue(maxsize=maxsize)
+        self._batch_size = batch_size
+        self._flush_interval = flush_interval
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    @property
+    def running(self) -> bool:
+        return self._thread is not None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="voucher-attempt-log", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: float = 10.0):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def enqueue(self, voucher_number: str, ip_address: str, user_agent: str, result: VoucherAttemptResult) -> bool:
+        """
+        Queue an attempt record. Returns False when the sink isn't running or the
+        queue is full, in which case the caller must write the record itself.
+        """
+        if self._thread is None:
+            return False
+        try:
+            self._queue.put_nowait({
+                "voucher_number_entered": voucher_number,
+                "ip_address": ip_address,
+                "user_agent": user_agent,
+                "result": result,
+                "created_at": datetime.utcnow(),
+            })
+            return True
+        except queue.Full:
+            return False
+
+    def _run(self):
+        batch: List[dict] = []
+        deadline = 0.0
+        while True:
+            stopping = self._stop.is_set()
+            timeout = self._flush_interval if not batch else max(0.0, deadline - time.monotonic())
+            try:
+                if stopping:
+                    record = self._queue.get_nowait()
+                else:
+                    record = self._queue.get(timeout=timeout)
+                if not batch:
+                    deadline = time.monotonic() + self._flush_interval
+                batch.append(record)
+            except queue.Empty:
+                if stopping:
+                    # Queue drained after shutdown was requested
+                    if batch:
+                        self._write(batch)
+                    return
+
+            if batch and (len(batch) >= self._batch_size or (not stopping and time.monotonic() >= deadline)):
+                self._write(batch)
+                batch = []
+
+    def _write(self, rows: List[dict]):
+        db = SessionLocal()
+        try:
+            db.execute(insert(VoucherAttemptLog), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            logger.exception("Failed to write %d voucher attempt log records", len(rows))
+        finally:
+            db.close()
+
+attempt_log_sink = AttemptLogSink(
+    maxsize=settings.ATTEMPT_LOG_QUEUE_SIZE,
+    batch_size=settings.ATTEMPT_LOG_BATCH_SIZE,
+    flush_interval=settings.ATTEMPT_LOG_FLUSH_INTERVAL_SECONDS,
+)
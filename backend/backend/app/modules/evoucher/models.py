@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Enum as SqlEnum, DateTime, ForeignKey, Index
+from sqlalchemy import Column, Integer, String, Enum as SqlEnum, DateTime, ForeignKey, Index, text
 from sqlalchemy.orm import relationship
 import enum
 from datetime import datetime
@@ -28,7 +28,7 @@ class EVoucher(Base):
     
     expires_at = Column(DateTime, nullable=False)
     reserved_at = Column(DateTime, nullable=True)
-    reserved_session_id = Column(String, nullable=True, index=True)
+    reserved_session_id = Column(String, nullable=True, unique=True, index=True)
     
     used_at = Column(DateTime, nullable=True)
     used_by_student_id = Column(Integer, ForeignKey("student.id"), nullable=True)
@@ -40,6 +40,17 @@ class EVoucher(Base):
     used_by_student = relationship("Student")
     admission = relationship("Admission", back_populates="voucher", uselist=False)
 
+    __table_args__ = (
+        # Keyset pagination order for the admin voucher listing
+        Index("ix_evoucher_academic_year_id_status_id", "academic_year_id", "status", "id"),
+        # Partial index for the reservation reaper; only live reservations are indexed
+        Index(
+            "ix_evoucher_status_reserved_at_reserved", "status", "reserved_at",
+            postgresql_where=text("status = 'RESERVED'"),
+            sqlite_where=text("status = 'RESERVED'")
+        ),
+    )
+
 class VoucherAttemptLog(Base):
     id = Column(Integer, primary_key=True, index=True)
     voucher_number_entered = Column(String, index=True)
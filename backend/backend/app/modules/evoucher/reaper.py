@@ -0,0 +1,61 @@
+import asyncio
+import logging
+import time
+from typing import Optional
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.logging import logger
+from app.db.session import SessionLocal
+from .service import EVoucherService
+
+class ReservationReaper:
+    """
+    Periodically releases expired voucher reservations from inside the app lifespan,
+    so abandoned wizard sessions free their vouchers without an admin call.
+    """
+
+    def __init__(self, interval: float):
+        self._interval = interval
+        self._task: Optional[asyncio.Task] = None
+        self.last_released: Optional[int] = None
+        self.last_duration_ms: Optional[float] = None
+
+    def start(self):
+        if self._interval > 0 and self._task is None:
+            self._task = asyncio.create_task(self._run(), name="voucher-reservation-reaper")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+
+    def sweep(self) -> int:
+        started = time.perf_counter()
+        db = SessionLocal()
+        try:
+            released = EVoucherService.cleanup_expired_reservations(db)
+        finally:
+            db.close()
+        self.last_released = released
+        self.last_duration_ms = (time.perf_counter() - started) * 1000
+        logger.log(
+            logging.INFO if released else logging.DEBUG,
+            "Reservation reaper released %d expired reservations in %.1f ms",
+            released, self.last_duration_ms
+        )
+        return released
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self._interval)
+            try:
+                await run_in_threadpool(self.sweep)
+            except Exception:
+                logger.exception("Reservation reaper sweep failed")
+
+reservation_reaper = ReservationReaper(settings.RESERVATION_REAPER_INTERVAL_SECONDS)
@@ -1 +1,178 @@
-# Placeholder for repository.py in evoucher module
+from typing import Iterable, List, Optional, Set, Tuple
+from datetime import datetime
+from sqlalchemy import Row, insert, select, update, tuple_, text, literal, case, cast, or_
+from sqlalchemy.orm import Session, Query
+from .models import EVoucher, VoucherStatus
+
+# Keyset order for the admin listing; matches ix_evoucher_academic_year_id_status_id
+LISTING_ORDER = (EVoucher.academic_year_id, EVoucher.status, EVoucher.id)
+
+class EVoucherRepository:
+    @staticmethod
+    def existing_voucher_numbers(db: Session, voucher_numbers: Iterable[str]) -> Set[str]:
+        """Return which of the given voucher numbers are already taken, in one query."""
+        numbers = list(voucher_numbers)
+        if not numbers:
+            return set()
+        rows = db.execute(
+            select(EVoucher.voucher_number).where(EVoucher.voucher_number.in_(numbers))
+        )
+        return {row[0] for row in rows}
+
+    @staticmethod
+    def bulk_insert(db: Session, rows: List[dict]) -> None:
+        # Core executemany: SQLAlchemy batches this into multi-row INSERT statements
+        # instead of one INSERT (and identity fetch) per ORM object.
+        if rows:
+            db.execute(insert(EVoucher), rows)
+
+    @staticmethod
+    def update_pin_hash(db: Session, voucher_id: int, pin_hash: str) -> None:
+        db.execute(
+            update(EVoucher)
+            .where(EVoucher.id == voucher_id)
+            .values(pin_hash=pin_hash)
+            .execution_options(synchronize_session=False)
+        )
+
+    @staticmethod
+    def claim(
+        db: Session, voucher_id: int, session_token: str, now: datetime, reservation_cutoff: datetime
+    ) -> Optional[Tuple[VoucherStatus, int]]:
+        """
+        Reserve the voucher, or mark it expired, in one conditional UPDATE ... RETURNING.
+
+        Matches only vouchers that are Unused, whose reservation is older than
+        `reservation_cutoff`, or that have passed `expires_at`. Expired vouchers are
+        flipped to Expired; everything else is reserved for `session_token`. Returns
+        (new status, academic_year_id), or None if the voucher wasn't claimable
+        (used, revoked, already expired, or actively reserved by someone else).
+        Row locking makes concurrent claims of the same voucher have a single winner.
+        """
+        is_expired = EVoucher.expires_at < now
+        statement = (
+            update(EVoucher)
+            .where(
+                EVoucher.id == voucher_id,
+                EVoucher.status.in_([VoucherStatus.UNUSED, VoucherStatus.RESERVED]),
+                or_(
+                    EVoucher.status == VoucherStatus.UNUSED,
+                    EVoucher.reserved_at < reservation_cutoff,
+                    is_expired,
+                ),
+            )
+            .values(
+                # CAST, not just a typed bind: Postgres types a CASE of bare parameters as text
+                status=case(
+                    (is_expired, cast(literal(VoucherStatus.EXPIRED, EVoucher.status.type), EVoucher.status.type)),
+                    else_=cast(literal(VoucherStatus.RESERVED, EVoucher.status.type), EVoucher.status.type)
+                ),
+                reserved_at=case((is_expired, EVoucher.reserved_at), else_=now),
+                reserved_session_id=case((is_expired, EVoucher.reserved_session_id), else_=session_token),
+            )
+            .returning(EVoucher.status, EVoucher.academic_year_id)
+            .execution_options(synchronize_session=False)
+        )
+        row = db.execute(statement).first()
+        return (row[0], row[1]) if row else None
+
+    @staticmethod
+    def lock_reserved_session(db: Session, session_token: str, reservation_cutoff: datetime) -> Optional[Row]:
+        """
+        The voucher reserved for `session_token`, if the reservation is still live,
+        locked FOR UPDATE so it can't be released or re-claimed until the caller's
+        transaction ends.
+        """
+        return db.execute(
+            select(EVoucher.id, EVoucher.voucher_number, EVoucher.academic_year_id)
+            .where(
+                EVoucher.reserved_session_id == session_token,
+                EVoucher.status == VoucherStatus.RESERVED,
+                EVoucher.reserved_at > reservation_cutoff,
+            )
+            .with_for_update()
+        ).first()
+
+    @staticmethod
+    def session_still_reserved(db: Session, voucher_id: int, session_token: str) -> bool:
+        """Primary-key probe confirming a cached session: the voucher is still reserved for this token."""
+        return db.execute(
+            select(EVoucher.id).where(
+                EVoucher.id == voucher_id,
+                EVoucher.reserved_session_id == session_token,
+                EVoucher.status == VoucherStatus.RESERVED,
+            )
+        ).first() is not None
+
+    @staticmethod
+    def release_session(db: Session, session_token: str) -> bool:
+        result = db.execute(
+            update(EVoucher)
+            .where(
+                EVoucher.reserved_session_id == session_token,
+                EVoucher.status == VoucherStatus.RESERVED
+            )
+            .values(status=VoucherStatus.UNUSED, reserved_at=None, reserved_session_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount > 0
+
+    @staticmethod
+    def release_expired_reservations(db: Session, reservation_cutoff: datetime) -> int:
+        """Release every reservation older than the cutoff in one set-based UPDATE."""
+        result = db.execute(
+            update(EVoucher)
+            .where(
+                EVoucher.status == VoucherStatus.RESERVED,
+                EVoucher.reserved_at < reservation_cutoff
+            )
+            .values(status=VoucherStatus.UNUSED, reserved_at=None, reserved_session_id=None)
+            .execution_options(synchronize_session=False)
+        )
+        return result.rowcount
+
+    @staticmethod
+    def filtered_query(
+        db: Session,
+        academic_year_id: Optional[int] = None,
+        status: Optional[VoucherStatus] = None
+    ) -> Query:
+        query = db.query(EVoucher)
+        if academic_year_id:
+            query = query.filter(EVoucher.academic_year_id == academic_year_id)
+        if status:
+            query = query.filter(EVoucher.status == status)
+        return query
+
+    @staticmethod
+    def page_after(query: Query, after: Optional[Tuple[int, VoucherStatus, int]], size: int) -> List[EVoucher]:
+        """Seek past the `after` key instead of OFFSET-scanning the skipped rows."""
+        if after is not None:
+            # Typed literals so the status enum is bound by its stored label
+            key = tuple_(*(literal(value, column.type) for column, value in zip(LISTING_ORDER, after)))
+            query = query.filter(tuple_(*LISTING_ORDER) > key)
+        return query.order_by(*LISTING_ORDER).limit(size).all()
+
+    @staticmethod
+    def page_at_offset(query: Query, offset: int, size: int) -> List[EVoucher]:
+        return query.order_by(*LISTING_ORDER).offset(offset).limit(size).all()
+
+    @staticmethod
+    def count(query: Query) -> int:
+        return query.count()
+
+    @staticmethod
+    def estimate_count(db: Session, query: Query) -> Optional[int]:
+        """
+        Planner row estimate for the query (Postgres only). Constant time regardless
+        of table size; returns None on other dialects.
+        """
+        bind = db.get_bind()
+        if bind.dialect.name != "postgresql":
+            return None
+        # Filters are typed ints/enums, so rendering them as literals is safe
+        statement = query.with_entities(EVoucher.id).statement.compile(
+            dialect=bind.dialect, compile_kwargs={"literal_binds": True}
+        )
+        plan = db.execute(text(f"EXPLAIN (FORMAT JSON) {statement}")).scalar()
+        return int(plan[0]["Plan"]["Plan Rows"])
@@ -1,29 +1,72 @@
-from fastapi import APIRouter, Depends, Request, HTTPException
+from fastapi import APIRouter, Depends, Request, HTTPException, Query
+from fastapi.responses import StreamingResponse
+from starlette.concurrency import run_in_threadpool
 from sqlalchemy.orm import Session
-from typing import List
-from app.db.session import get_db
+from typing import List, Optional
+from app.db.session import get_db, get_read_db
+from app.core.config import settings
+from app.core.rate_limit import SlidingWindowLimiter, rate_limit_backend, client_ip, enforce
 from . import schemas, service, models
 
 router = APIRouter()
 
+verify_ip_limiter = SlidingWindowLimiter(
+    "voucher-verify-ip", settings.VOUCHER_VERIFY_IP_LIMIT,
+    settings.VOUCHER_VERIFY_WINDOW_SECONDS, rate_limit_backend
+)
+verify_number_limiter = SlidingWindowLimiter(
+    "voucher-verify-number", settings.VOUCHER_VERIFY_NUMBER_LIMIT,
+    settings.VOUCHER_VERIFY_WINDOW_SECONDS, rate_limit_backend
+)
+
 # --- Public Endpoints ---
 
-@router.post("/verify", response_model=schemas.EVoucherSessionResponse)
-def verify_voucher(
-    obj_in: schemas.EVoucherVerify, 
-    request: Request,
-    db: Session = Depends(get_db)
-):
-    ip_address = request.client.host
-    user_agent = request.headers.get("user-agent", "unknown")
-    return service.EVoucherService.verify_voucher(db, obj_in, ip_address, user_agent)
+if settings.DB_ASYNC:
+    from sqlalchemy.ext.asyncio import AsyncSession
+    from app.db.session import get_async_db
 
-@router.get("/check-session/{session_token}", response_model=schemas.EVoucherSessionResponse)
-def check_session(
-    session_token: str,
-    db: Session = Depends(get_db)
-):
-    return service.EVoucherService.check_session(db, session_token)
+    # Async ports: the request doesn't hold a threadpool thread while waiting on Postgres
+    @router.post("/verify", response_model=schemas.EVoucherSessionResponse)
+    async def verify_voucher(
+        obj_in: schemas.EVoucherVerify,
+        request: Request,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        ip_address = client_ip(request)
+        # Throttle before any DB or PIN hash work; the limiter backend may be Redis,
+        # so keep its round trips off the event loop
+        await run_in_threadpool(enforce, verify_ip_limiter, ip_address)
+        await run_in_threadpool(enforce, verify_number_limiter, obj_in.voucher_number)
+        user_agent = request.headers.get("user-agent", "unknown")
+        return await service.EVoucherService.verify_voucher_async(db, obj_in, ip_address, user_agent)
+
+    @router.get("/check-session/{session_token}", response_model=schemas.EVoucherSessionResponse)
+    async def check_session(
+        session_token: str,
+        db: AsyncSession = Depends(get_async_db)
+    ):
+        return await service.EVoucherService.check_session_async(db, session_token)
+
+else:
+    @router.post("/verify", response_model=schemas.EVoucherSessionResponse)
+    def verify_voucher(
+        obj_in: schemas.EVoucherVerify, 
+        request: Request,
+        db: Session = Depends(get_db)
+    ):
+        ip_address = client_ip(request)
+        # Throttle before any DB or PIN hash work
+        enforce(verify_ip_limiter, ip_address)
+        enforce(verify_number_limiter, obj_in.voucher_number)
+        user_agent = request.headers.get("user-agent", "unknown")
+        return service.EVoucherService.verify_voucher(db, obj_in, ip_address, user_agent)
+
+    @router.get("/check-session/{session_token}", response_model=schemas.EVoucherSessionResponse)
+    def check_session(
+        session_token: str,
+        db: Session = Depends(get_db)
+    ):
+        return service.EVoucherService.check_session(db, session_token)
 
 @router.delete("/release-session/{session_token}", response_model=schemas.VoucherActionResponse)
 def release_session(
@@ -45,31 +88,42 @@ def create_vouchers(
     # TODO: Add admin permission check
     return service.EVoucherService.create_vouchers(db, obj_in)
 
+EXPORT_MEDIA_TYPES = {
+    schemas.VoucherExportFormat.CSV: "text/csv",
+    schemas.VoucherExportFormat.NDJSON: "application/x-ndjson",
+}
+
+@router.post("/admin/vouchers/export")
+def export_vouchers(
+    obj_in: schemas.EVoucherBulkCreate,
+    format: schemas.VoucherExportFormat = schemas.VoucherExportFormat.CSV
+):
+    """
+    Generate vouchers and stream the voucher_number/pin pairs to the print vendor
+    as each chunk is committed. The only route for batches over 1000.
+    """
+    # TODO: Add admin permission check
+    filename = f"vouchers_{obj_in.academic_year_id}.{format.value}"
+    return StreamingResponse(
+        service.EVoucherService.stream_voucher_export(obj_in, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{filename}"'}
+    )
+
 @router.get("/admin/vouchers", response_model=schemas.PaginatedEVoucherResponse)
 def list_vouchers(
     academic_year_id: int = None,
     status: models.VoucherStatus = None,
-    page: int = 1,
-    size: int = 50,
-    db: Session = Depends(get_db)
+    page: int = Query(1, ge=1),
+    size: int = Query(50, ge=1, le=500),
+    cursor: Optional[str] = None,
+    total: schemas.VoucherTotalMode = schemas.VoucherTotalMode.EXACT,
+    db: Session = Depends(get_read_db)
 ):
     # TODO: Add admin permission check
-    query = db.query(models.EVoucher)
-    if academic_year_id:
-        query = query.filter(models.EVoucher.academic_year_id == academic_year_id)
-    if status:
-        query = query.filter(models.EVoucher.status == status)
-    
-    total = query.count()
-    skip = (page - 1) * size
-    items = query.offset(skip).limit(size).all()
-
-    return {
-        "items": items,
-        "total": total,
-        "page": page,
-        "size": size
-    }
+    return service.EVoucherService.list_vouchers(
+        db, academic_year_id, status, page, size, cursor=cursor, total_mode=total
+    )
 
 @router.delete("/admin/cleanup-reservations", response_model=schemas.VoucherActionResponse)
 def cleanup_expired_reservations(
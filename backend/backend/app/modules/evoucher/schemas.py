@@ -1,7 +1,9 @@
 from pydantic import BaseModel, Field
+import enum
 from datetime import datetime
 from typing import Optional, List
 from .models import VoucherStatus, VoucherAttemptResult
+from app.core.config import settings
 
 class EVoucherBase(BaseModel):
     voucher_number: str
@@ -13,6 +15,21 @@ class EVoucherCreate(BaseModel):
     count: int = Field(..., gt=0, le=1000) # max 1000 vouchers at once
     expires_at: datetime
 
+class EVoucherBulkCreate(BaseModel):
+    academic_year_id: int
+    count: int = Field(..., gt=0, le=settings.VOUCHER_BULK_MAX_COUNT)
+    expires_at: datetime
+    chunk_size: Optional[int] = Field(None, gt=0, le=5000) # defaults to VOUCHER_BATCH_CHUNK_SIZE
+
+class VoucherExportFormat(str, enum.Enum):
+    CSV = "csv"
+    NDJSON = "ndjson"
+
+class VoucherTotalMode(str, enum.Enum):
+    EXACT = "exact" # COUNT(*), cached for VOUCHER_COUNT_CACHE_SECONDS
+    ESTIMATE = "estimate" # planner estimate on Postgres, cached exact count elsewhere
+    NONE = "none"
+
 class EVoucherResponse(EVoucherBase):
     id: int
     status: VoucherStatus
@@ -43,6 +60,8 @@ class VoucherActionResponse(BaseModel):
 
 class PaginatedEVoucherResponse(BaseModel):
     items: List[EVoucherResponse]
-    total: int
+    total: Optional[int] = None
+    total_is_estimate: bool = False
     page: int
     size: int
+    next_cursor: Optional[str] = None # pass back as `cursor` to fetch the following page
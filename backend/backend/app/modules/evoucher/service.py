@@ -1,45 +1,252 @@
+import base64
+import csv
+import io
+import json
 import secrets
 import string
+import time
 import uuid
 from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Dict, Iterator, List, Optional, Set, Tuple
+from sqlalchemy import Row, select
+from sqlalchemy.exc import IntegrityError, SQLAlchemyError
 from sqlalchemy.orm import Session
-from app.core.security import get_password_hash, verify_password
+from starlette.concurrency import run_in_threadpool
+from app.core.config import settings
+from app.core.logging import logger
+from app.core.security import hash_voucher_pins, verify_voucher_pin
 from .models import EVoucher, VoucherStatus, VoucherAttemptLog, VoucherAttemptResult
-from .schemas import EVoucherCreate, EVoucherVerify, EVoucherSessionResponse
+from app.db.session import SessionLocal
+from fastapi import HTTPException
+from .schemas import (
+    EVoucherCreate, EVoucherBulkCreate, EVoucherVerify, EVoucherSessionResponse,
+    VoucherExportFormat, VoucherTotalMode
+)
+from .repository import EVoucherRepository
+from .attempt_log import attempt_log_sink
+from .session_cache import VoucherSession, voucher_session_cache
+
+if TYPE_CHECKING:
+    # Only importable with greenlet installed, i.e. when DB_ASYNC is in use
+    from sqlalchemy.ext.asyncio import AsyncSession
 
 RESERVATION_TTL_MINUTES = 15
+VOUCHER_NUMBER_LENGTH = 10
+VOUCHER_PIN_LENGTH = 6
+CHUNK_INSERT_ATTEMPTS = 3
+
+# Process-local cache of exact listing counts: (academic_year_id, status) -> (expires, total)
+_count_cache: Dict[Tuple[Optional[int], Optional[VoucherStatus]], Tuple[float, int]] = {}
 
 def generate_random_string(length: int, chars: str = string.digits) -> str:
     return ''.join(secrets.choice(chars) for _ in range(length))
 
+def encode_cursor(voucher: EVoucher) -> str:
+    key = [voucher.academic_year_id, voucher.status.name, voucher.id]
+    return base64.urlsafe_b64encode(json.dumps(key).encode()).decode()
+
+def decode_cursor(cursor: str) -> Tuple[int, VoucherStatus, int]:
+    try:
+        year_id, status_name, voucher_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        return int(year_id), VoucherStatus[status_name], int(voucher_id)
+    except (ValueError, KeyError, TypeError):
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor")
+
 class EVoucherService:
+    @staticmethod
+    def _unique_voucher_numbers(db: Session, count: int, seen: Set[str]) -> List[str]:
+        """
+        Draw `count` voucher numbers that are unique within this run (`seen`) and
+        in the table, checking the whole chunk against the DB in one query.
+        """
+        numbers: Set[str] = set()
+        while len(numbers) < count:
+            while len(numbers) < count:
+                candidate = generate_random_string(VOUCHER_NUMBER_LENGTH)
+                if candidate not in seen:
+                    numbers.add(candidate)
+            taken = EVoucherRepository.existing_voucher_numbers(db, numbers)
+            numbers -= taken
+            seen |= taken
+        seen |= numbers
+        return list(numbers)
+
+    @staticmethod
+    def generate_voucher_batches(
+        db: Session,
+        academic_year_id: int,
+        expires_at: datetime,
+        count: int,
+        chunk_size: Optional[int] = None
+    ) -> Iterator[List[dict]]:
+        """
+        Generate `count` vouchers in chunks. Each chunk's PINs are hashed across the
+        process pool and written with a single bulk insert, then committed; the
+        plaintext voucher_number/pin pairs are yielded once the chunk is durable.
+        """
+        chunk_size = chunk_size or settings.VOUCHER_BATCH_CHUNK_SIZE
+        seen: Set[str] = set()
+        remaining = count
+        while remaining > 0:
+            size = min(chunk_size, remaining)
+            pins = [generate_random_string(VOUCHER_PIN_LENGTH) for _ in range(size)]
+            pin_hashes = hash_voucher_pins(pins)
+
+            for attempt in range(CHUNK_INSERT_ATTEMPTS):
+                numbers = EVoucherService._unique_voucher_numbers(db, size, seen)
+                try:
+                    EVoucherRepository.bulk_insert(db, [
+                        {
+                            "voucher_number": number,
+                            "pin_hash": pin_hash,
+                            "academic_year_id": academic_year_id,
+                            "expires_at": expires_at,
+                            "status": VoucherStatus.UNUSED,
+                        }
+                        for number, pin_hash in zip(numbers, pin_hashes)
+                    ])
+                    db.commit()
+                    break
+                except IntegrityError:
+                    # A concurrent batch claimed one of our numbers between the check and the insert
+                    db.rollback()
+                    if attempt == CHUNK_INSERT_ATTEMPTS - 1:
+                        raise
+
+            remaining -= size
+            yield [{"voucher_number": number, "pin": pin} for number, pin in zip(numbers, pins)]
+
     @staticmethod
     def create_vouchers(db: Session, obj_in: EVoucherCreate) -> list:
+        """
+        Generate up to 1000 vouchers and return their PINs in one response; larger
+        batches go through stream_voucher_export. Chunks commit one by one, so if one
+        fails the error still returns the vouchers already committed.
+        """
         vouchers_data = []
-        for _ in range(obj_in.count):
-            voucher_number = generate_random_string(10) # 10 digit voucher
-            pin = generate_random_string(6) # 6 digit PIN
-            pin_hash = get_password_hash(pin)
-            
-            db_obj = EVoucher(
-                voucher_number=voucher_number,
-                pin_hash=pin_hash,
-                academic_year_id=obj_in.academic_year_id,
-                expires_at=obj_in.expires_at,
-                status=VoucherStatus.UNUSED
-            )
-            db.add(db_obj)
-            vouchers_data.append({"voucher_number": voucher_number, "pin": pin})
-        
-        db.commit()
+        chunks = 0
+        try:
+            for batch in EVoucherService.generate_voucher_batches(
+                db, obj_in.academic_year_id, obj_in.expires_at, obj_in.count
+            ):
+                vouchers_data.extend(batch)
+                chunks += 1
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Voucher generation failed after %d committed chunks", chunks)
+            raise HTTPException(status_code=500, detail={
+                "message": f"Voucher generation failed; {len(vouchers_data)} of {obj_in.count} vouchers were created",
+                "committed_chunks": chunks,
+                "vouchers": vouchers_data,
+            })
         return vouchers_data
 
+    @staticmethod
+    def stream_voucher_export(obj_in: EVoucherBulkCreate, fmt: VoucherExportFormat) -> Iterator[str]:
+        """
+        Generate vouchers and yield them as CSV or NDJSON text, one chunk at a time,
+        so only a single chunk of plaintext PINs is ever held in memory. Every row
+        sent is committed. If a chunk fails, NDJSON ends with an error line giving
+        the committed count; CSV is cut short so the transfer visibly fails.
+        Owns its session because it keeps running after the request handler returns.
+        """
+        db = SessionLocal()
+        committed = 0
+        try:
+            if fmt == VoucherExportFormat.CSV:
+                yield "voucher_number,pin\r\n"
+            for batch in EVoucherService.generate_voucher_batches(
+                db, obj_in.academic_year_id, obj_in.expires_at, obj_in.count,
+                chunk_size=obj_in.chunk_size
+            ):
+                buffer = io.StringIO()
+                if fmt == VoucherExportFormat.CSV:
+                    writer = csv.writer(buffer)
+                    writer.writerows((v["voucher_number"], v["pin"]) for v in batch)
+                else:
+                    for v in batch:
+                        buffer.write(json.dumps(v))
+                        buffer.write("\n")
+                committed += len(batch)
+                yield buffer.getvalue()
+        except SQLAlchemyError:
+            db.rollback()
+            logger.exception("Voucher export failed after %d of %d vouchers were committed", committed, obj_in.count)
+            if fmt == VoucherExportFormat.CSV:
+                raise
+            yield json.dumps({
+                "error": "Voucher generation failed; the vouchers above were created",
+                "committed": committed,
+                "requested": obj_in.count,
+            }) + "\n"
+        finally:
+            db.close()
+
+    @staticmethod
+    def _listing_total(
+        db: Session, query, academic_year_id: Optional[int],
+        status: Optional[VoucherStatus], mode: VoucherTotalMode
+    ) -> Tuple[Optional[int], bool]:
+        if mode == VoucherTotalMode.NONE:
+            return None, False
+        if mode == VoucherTotalMode.ESTIMATE:
+            estimate = EVoucherRepository.estimate_count(db, query)
+            if estimate is not None:
+                return estimate, True
+
+        key = (academic_year_id, status)
+        now = time.monotonic()
+        cached = _count_cache.get(key)
+        if cached and cached[0] > now:
+            return cached[1], False
+        total = EVoucherRepository.count(query)
+        _count_cache[key] = (now + settings.VOUCHER_COUNT_CACHE_SECONDS, total)
+        return total, False
+
+    @staticmethod
+    def list_vouchers(
+        db: Session,
+        academic_year_id: Optional[int],
+        status: Optional[VoucherStatus],
+        page: int,
+        size: int,
+        cursor: Optional[str] = None,
+        total_mode: VoucherTotalMode = VoucherTotalMode.EXACT
+    ) -> dict:
+        """
+        List vouchers ordered by (academic_year_id, status, id). With a cursor the page
+        is fetched by seeking the composite index, so deep pages cost the same as the first;
+        without one it falls back to OFFSET paging.
+        """
+        query = EVoucherRepository.filtered_query(db, academic_year_id, status)
+        if cursor:
+            items = EVoucherRepository.page_after(query, decode_cursor(cursor), size)
+        else:
+            items = EVoucherRepository.page_at_offset(query, (page - 1) * size, size)
+
+        total, total_is_estimate = EVoucherService._listing_total(
+            db, query, academic_year_id, status, total_mode
+        )
+        return {
+            "items": items,
+            "total": total,
+            "total_is_estimate": total_is_estimate,
+            "page": page,
+            "size": size,
+            "next_cursor": encode_cursor(items[-1]) if len(items) == size else None
+        }
+
     @staticmethod
     def verify_voucher(db: Session, obj_in: EVoucherVerify, ip_address: str, user_agent: str) -> EVoucherSessionResponse:
-        voucher = db.query(EVoucher).filter(EVoucher.voucher_number == obj_in.voucher_number).first()
+        voucher = db.query(EVoucher.id, EVoucher.pin_hash, EVoucher.status).filter(
+            EVoucher.voucher_number == obj_in.voucher_number
+        ).first()
         
-        # Log attempt helper
+        # Log attempt helper: buffered by the background sink, written inline only
+        # when the sink isn't running or its queue is full
         def log_attempt(result: VoucherAttemptResult):
+            if attempt_log_sink.enqueue(obj_in.voucher_number, ip_address, user_agent, result):
+                return
             log = VoucherAttemptLog(
                 voucher_number_entered=obj_in.voucher_number,
                 ip_address=ip_address,
@@ -53,98 +260,223 @@ class EVoucherService:
             log_attempt(VoucherAttemptResult.NOT_FOUND)
             return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.NOT_FOUND)
 
-        if not verify_password(obj_in.pin, voucher.pin_hash):
+        pin_valid, upgraded_hash = verify_voucher_pin(obj_in.pin, voucher.pin_hash)
+        if not pin_valid:
             log_attempt(VoucherAttemptResult.INVALID_PIN)
             return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.INVALID_PIN)
 
-        if voucher.status == VoucherStatus.USED:
-            log_attempt(VoucherAttemptResult.USED)
-            return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.USED)
-
-        if voucher.status == VoucherStatus.REVOKED:
-            log_attempt(VoucherAttemptResult.NOT_FOUND) # Don't leak revoked status, just say not found/invalid
-            return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.NOT_FOUND)
-
-        if voucher.expires_at < datetime.utcnow():
-            voucher.status = VoucherStatus.EXPIRED
-            db.commit()
-            log_attempt(VoucherAttemptResult.EXPIRED)
-            return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.EXPIRED)
+        if upgraded_hash:
+            # Hash was made with a different cost; replace it in the same transaction as the claim
+            EVoucherRepository.update_pin_hash(db, voucher.id, upgraded_hash)
 
-        # Handle Reservation
+        # Claim (or expire) the voucher atomically; status checks happen in the WHERE clause
         now = datetime.utcnow()
-        if voucher.status == VoucherStatus.RESERVED:
-            # Check if reservation still valid
-            if voucher.reserved_at + timedelta(minutes=RESERVATION_TTL_MINUTES) > now:
-                # Still reserved by someone else
-                log_attempt(VoucherAttemptResult.RESERVED)
-                return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.RESERVED)
-            # Reservation expired, we can take it
-        
-        # All checks passed, Reserve it
         session_token = str(uuid.uuid4())
-        voucher.status = VoucherStatus.RESERVED
-        voucher.reserved_at = now
-        voucher.reserved_session_id = session_token
+        claimed = EVoucherRepository.claim(
+            db, voucher.id, session_token, now,
+            reservation_cutoff=now - timedelta(minutes=RESERVATION_TTL_MINUTES)
+        )
         db.commit()
-        
-        log_attempt(VoucherAttemptResult.VALID)
-        return EVoucherSessionResponse(
+
+        result, response = EVoucherService._claim_response(
+            obj_in.voucher_number, voucher.id, voucher.status, claimed, session_token, now
+        )
+        log_attempt(result)
+        return response
+
+    @staticmethod
+    def _claim_response(
+        voucher_number: str,
+        voucher_id: int,
+        status_before: VoucherStatus,
+        claimed: Optional[Tuple[VoucherStatus, int]],
+        session_token: str,
+        now: datetime
+    ) -> Tuple[VoucherAttemptResult, EVoucherSessionResponse]:
+        """Turn a claim outcome into the attempt result to log and the response to send."""
+        if claimed is None:
+            # Not claimable: report why from the status we read, except that an Unused
+            # voucher we lost the race for is now reserved by the winner
+            reason = {
+                VoucherStatus.USED: VoucherAttemptResult.USED,
+                VoucherStatus.REVOKED: VoucherAttemptResult.NOT_FOUND, # Don't leak revoked status, just say not found/invalid
+                VoucherStatus.EXPIRED: VoucherAttemptResult.EXPIRED,
+            }.get(status_before, VoucherAttemptResult.RESERVED)
+            return reason, EVoucherSessionResponse(valid=False, reason=reason)
+
+        status, academic_year_id = claimed
+        if status == VoucherStatus.EXPIRED:
+            return VoucherAttemptResult.EXPIRED, EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.EXPIRED)
+
+        expires_at = now + timedelta(minutes=RESERVATION_TTL_MINUTES)
+        voucher_session_cache.put(session_token, VoucherSession(
+            voucher_id=voucher_id,
+            voucher_number=voucher_number,
+            academic_year_id=academic_year_id,
+            expires_at=expires_at
+        ))
+        return VoucherAttemptResult.VALID, EVoucherSessionResponse(
             valid=True, 
             voucher_session_token=session_token,
-            expires_at=now + timedelta(minutes=RESERVATION_TTL_MINUTES),
-            academic_year_id=voucher.academic_year_id
+            expires_at=expires_at,
+            academic_year_id=academic_year_id
+        )
+
+    @staticmethod
+    async def verify_voucher_async(
+        db: "AsyncSession", obj_in: EVoucherVerify, ip_address: str, user_agent: str
+    ) -> EVoucherSessionResponse:
+        """
+        verify_voucher on an AsyncSession. Queries run on the event loop; the PIN hash
+        is CPU-bound so it goes to a worker thread (and from there the hash pool).
+        Repository calls are shared with the sync path through run_sync.
+        """
+        voucher = (await db.execute(
+            select(EVoucher.id, EVoucher.pin_hash, EVoucher.status)
+            .where(EVoucher.voucher_number == obj_in.voucher_number)
+        )).first()
+
+        async def log_attempt(result: VoucherAttemptResult):
+            if attempt_log_sink.enqueue(obj_in.voucher_number, ip_address, user_agent, result):
+                return
+            db.add(VoucherAttemptLog(
+                voucher_number_entered=obj_in.voucher_number,
+                ip_address=ip_address,
+                user_agent=user_agent,
+                result=result
+            ))
+            await db.commit()
+
+        if not voucher:
+            await log_attempt(VoucherAttemptResult.NOT_FOUND)
+            return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.NOT_FOUND)
+
+        pin_valid, upgraded_hash = await run_in_threadpool(verify_voucher_pin, obj_in.pin, voucher.pin_hash)
+        if not pin_valid:
+            await log_attempt(VoucherAttemptResult.INVALID_PIN)
+            return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.INVALID_PIN)
+
+        if upgraded_hash:
+            await db.run_sync(EVoucherRepository.update_pin_hash, voucher.id, upgraded_hash)
+
+        now = datetime.utcnow()
+        session_token = str(uuid.uuid4())
+        claimed = await db.run_sync(
+            EVoucherRepository.claim, voucher.id, session_token, now,
+            now - timedelta(minutes=RESERVATION_TTL_MINUTES)
+        )
+        await db.commit()
+
+        # _claim_response writes the session cache, which may be Redis
+        result, response = await run_in_threadpool(
+            EVoucherService._claim_response,
+            obj_in.voucher_number, voucher.id, voucher.status, claimed, session_token, now
         )
+        await log_attempt(result)
+        return response
 
     @staticmethod
     def release_session(db: Session, session_token: str) -> bool:
-        voucher = db.query(EVoucher).filter(EVoucher.reserved_session_id == session_token).first()
-        if voucher and voucher.status == VoucherStatus.RESERVED:
-            voucher.status = VoucherStatus.UNUSED
-            voucher.reserved_at = None
-            voucher.reserved_session_id = None
-            db.commit()
-            return True
-        return False
+        released = EVoucherRepository.release_session(db, session_token)
+        db.commit()
+        voucher_session_cache.invalidate(session_token)
+        return released
 
     @staticmethod
-    def check_session(db: Session, session_token: str) -> EVoucherSessionResponse:
-        voucher = db.query(EVoucher).filter(EVoucher.reserved_session_id == session_token).first()
+    def get_session(db: Session, session_token: str) -> Optional[VoucherSession]:
+        """
+        Resolve a wizard session token to its reserved voucher. Does not check the
+        reservation TTL; callers that care compare `expires_at` themselves.
+
+        The cache is per worker and misses releases, reaps and admissions handled in
+        other workers, so a hit is confirmed with a primary-key status probe before
+        it is served. Writes use lock_session.
+        """
+        session = voucher_session_cache.get(session_token)
+        if session is not None:
+            if EVoucherRepository.session_still_reserved(db, session.voucher_id, session_token):
+                return session
+            voucher_session_cache.invalidate(session_token)
+            return None
+        session = EVoucherService._load_session(db, session_token)
+        if session is not None:
+            voucher_session_cache.put(session_token, session)
+        return session
+
+    @staticmethod
+    def _load_session(db: Session, session_token: str) -> Optional[VoucherSession]:
+        voucher = db.query(
+            EVoucher.id, EVoucher.voucher_number, EVoucher.academic_year_id,
+            EVoucher.status, EVoucher.reserved_at
+        ).filter(EVoucher.reserved_session_id == session_token).first()
         if not voucher or voucher.status != VoucherStatus.RESERVED:
+            return None
+
+        return VoucherSession(
+            voucher_id=voucher.id,
+            voucher_number=voucher.voucher_number,
+            academic_year_id=voucher.academic_year_id,
+            expires_at=voucher.reserved_at + timedelta(minutes=RESERVATION_TTL_MINUTES)
+        )
+
+    @staticmethod
+    def lock_session(db: Session, session_token: str) -> Optional[Row]:
+        """
+        Re-validate a wizard session against the voucher row inside the caller's
+        transaction: still reserved for this token, within the reservation TTL, and
+        locked until commit. Never served from the session cache.
+        """
+        cutoff = datetime.utcnow() - timedelta(minutes=RESERVATION_TTL_MINUTES)
+        return EVoucherRepository.lock_reserved_session(db, session_token, cutoff)
+
+    @staticmethod
+    def _session_response(session_token: str, session: Optional[VoucherSession], now: datetime) -> EVoucherSessionResponse:
+        if session is None:
             return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.NOT_FOUND)
-        
-        now = datetime.utcnow()
-        expires_at = voucher.reserved_at + timedelta(minutes=RESERVATION_TTL_MINUTES)
-        if expires_at < now:
-            # Session expired
-            voucher.status = VoucherStatus.UNUSED
-            voucher.reserved_at = None
-            voucher.reserved_session_id = None
-            db.commit()
+        if session.expires_at < now:
             return EVoucherSessionResponse(valid=False, reason=VoucherAttemptResult.EXPIRED)
-        
         return EVoucherSessionResponse(
             valid=True,
             voucher_session_token=session_token,
-            expires_at=expires_at,
-            academic_year_id=voucher.academic_year_id
+            expires_at=session.expires_at,
+            academic_year_id=session.academic_year_id
         )
-            
+
     @staticmethod
-    def cleanup_expired_reservations(db: Session) -> int:
+    def check_session(db: Session, session_token: str) -> EVoucherSessionResponse:
         now = datetime.utcnow()
-        expired_time = now - timedelta(minutes=RESERVATION_TTL_MINUTES)
-        
-        expired_vouchers = db.query(EVoucher).filter(
-            EVoucher.status == VoucherStatus.RESERVED,
-            EVoucher.reserved_at < expired_time
-        ).all()
-        
-        count = len(expired_vouchers)
-        for v in expired_vouchers:
-            v.status = VoucherStatus.UNUSED
-            v.reserved_at = None
-            v.reserved_session_id = None
+        session = EVoucherService.get_session(db, session_token)
+        if session is not None and session.expires_at < now:
+            # Session expired
+            EVoucherService.release_session(db, session_token)
+        return EVoucherService._session_response(session_token, session, now)
+
+    @staticmethod
+    async def check_session_async(db: "AsyncSession", session_token: str) -> EVoucherSessionResponse:
+        """
+        check_session on an AsyncSession. The session cache may be Redis, so its calls
+        go to a worker thread instead of blocking the event loop.
+        """
+        now = datetime.utcnow()
+        session = await run_in_threadpool(voucher_session_cache.get, session_token)
+        if session is not None:
+            # Confirm the hit, as get_session does
+            if not await db.run_sync(EVoucherRepository.session_still_reserved, session.voucher_id, session_token):
+                await run_in_threadpool(voucher_session_cache.invalidate, session_token)
+                session = None
+        else:
+            session = await db.run_sync(EVoucherService._load_session, session_token)
+            if session is not None:
+                await run_in_threadpool(voucher_session_cache.put, session_token, session)
+        if session is not None and session.expires_at < now:
+            await db.run_sync(EVoucherRepository.release_session, session_token)
+            await db.commit()
+            await run_in_threadpool(voucher_session_cache.invalidate, session_token)
+        return EVoucherService._session_response(session_token, session, now)
             
+    @staticmethod
+    def cleanup_expired_reservations(db: Session) -> int:
+        expired_time = datetime.utcnow() - timedelta(minutes=RESERVATION_TTL_MINUTES)
+        count = EVoucherRepository.release_expired_reservations(db, expired_time)
         db.commit()
         return count
@@ -0,0 +1,112 @@
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, asdict
+from datetime import datetime
+from typing import Optional, Tuple
+from app.core.config import settings
+
+@dataclass(frozen=True)
+class VoucherSession:
+    """What the wizard needs to know about a reserved voucher, keyed by session token."""
+    voucher_id: int
+    voucher_number: str
+    academic_year_id: int
+    expires_at: datetime
+
+class SessionCacheBackend:
+    """Storage interface for the voucher session cache. Values are JSON strings."""
+
+    def get(self, key: str) -> Optional[str]:
+        raise NotImplementedError
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        raise NotImplementedError
+
+    def delete(self, key: str) -> None:
+        raise NotImplementedError
+
+class LocalSessionCacheBackend(SessionCacheBackend):
+    """Process-local LRU with per-entry expiry. Invalidations only reach this worker."""
+
+    def __init__(self, maxsize: int):
+        self._maxsize = maxsize
+        self._entries: "OrderedDict[str, Tuple[float, str]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1]
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        with self._lock:
+            self._entries[key] = (time.monotonic() + ttl_seconds, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def delete(self, key: str) -> None:
+        with self._lock:
+            self._entries.pop(key, None)
+
+class RedisSessionCacheBackend(SessionCacheBackend):
+    """Shared backend so invalidations reach every gunicorn worker."""
+
+    def __init__(self, url: str):
+        try:
+            import redis
+        except ImportError:
+            raise RuntimeError("VOUCHER_SESSION_CACHE_URL is set but the 'redis' package is not installed")
+        self._client = redis.Redis.from_url(url)
+
+    def get(self, key: str) -> Optional[str]:
+        value = self._client.get(key)
+        return value.decode() if value is not None else None
+
+    def set(self, key: str, value: str, ttl_seconds: float) -> None:
+        self._client.set(key, value, px=int(ttl_seconds * 1000))
+
+    def delete(self, key: str) -> None:
+        self._client.delete(key)
+
+class VoucherSessionCache:
+    KEY_PREFIX = "voucher-session:"
+
+    def __init__(self, backend: SessionCacheBackend):
+        self.backend = backend
+
+    def get(self, session_token: str) -> Optional[VoucherSession]:
+        value = self.backend.get(self.KEY_PREFIX + session_token)
+        if value is None:
+            return None
+        data = json.loads(value)
+        data["expires_at"] = datetime.fromisoformat(data["expires_at"])
+        return VoucherSession(**data)
+
+    def put(self, session_token: str, session: VoucherSession) -> None:
+        # Entries live exactly as long as the reservation they describe
+        ttl = (session.expires_at - datetime.utcnow()).total_seconds()
+        if ttl <= 0:
+            return
+        data = asdict(session)
+        data["expires_at"] = session.expires_at.isoformat()
+        self.backend.set(self.KEY_PREFIX + session_token, json.dumps(data), ttl)
+
+    def invalidate(self, session_token: Optional[str]) -> None:
+        if session_token:
+            self.backend.delete(self.KEY_PREFIX + session_token)
+
+def build_backend() -> SessionCacheBackend:
+    if settings.VOUCHER_SESSION_CACHE_URL:
+        return RedisSessionCacheBackend(settings.VOUCHER_SESSION_CACHE_URL)
+    return LocalSessionCacheBackend(settings.VOUCHER_SESSION_CACHE_SIZE)
+
+voucher_session_cache = VoucherSessionCache(build_backend())
@@ -0,0 +1,232 @@
+import calendar
+import secrets
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Optional, Tuple
+from fastapi import Depends, HTTPException
+from fastapi.security import OAuth2PasswordBearer
+from jose import JWTError
+from sqlalchemy import Row, select, union_all, update
+from sqlalchemy.orm import Session
+from app.core.config import settings
+from app.core.security import create_refresh_token, refresh_token_lifetime
+from app.core.token_revocation import revocation_store
+from app.core.tokens import token_verifier
+from app.db.session import get_db
+from . import models
+
+reusable_oauth2 = OAuth2PasswordBearer(
+    tokenUrl=f"{settings.API_V1_STR}/students/login"
+)
+
+@dataclass(frozen=True)
+class StudentPrincipal:
+    """The authenticated student as far as authorization needs to know, without the ORM graph."""
+    student_id: int
+    account_id: int
+    username: str
+    is_active: bool
+    must_change_password: bool
+    tokens_valid_after: Optional[float] = None # epoch seconds; older refresh tokens are revoked
+
+def principal_claims(principal: StudentPrincipal) -> dict:
+    """
+    Access-token claims for a student: identity only. Account state (active, must
+    change password) is read from the principal cache or the database per request,
+    so a deactivation takes effect before the token expires.
+    """
+    return {
+        "sub": principal.username,
+        "id": principal.student_id,
+        "type": "student",
+    }
+
+class PrincipalCache:
+    """
+    Short-lived, process-local cache of account state by student id, so authenticated
+    requests don't query the database. Entries are dropped explicitly whenever the
+    account changes in this worker; other workers pick the change up within the TTL.
+    """
+
+    def __init__(self, maxsize: int, ttl_seconds: float):
+        self._maxsize = maxsize
+        self._ttl = ttl_seconds
+        self._entries: "OrderedDict[int, Tuple[float, StudentPrincipal]]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, student_id: int) -> Optional[StudentPrincipal]:
+        with self._lock:
+            entry = self._entries.get(student_id)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[student_id]
+                return None
+            self._entries.move_to_end(student_id)
+            return entry[1]
+
+    def put(self, principal: StudentPrincipal) -> None:
+        if self._ttl <= 0:
+            return
+        with self._lock:
+            self._entries[principal.student_id] = (time.monotonic() + self._ttl, principal)
+            self._entries.move_to_end(principal.student_id)
+            while len(self._entries) > self._maxsize:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, *student_ids: int) -> None:
+        with self._lock:
+            for student_id in student_ids:
+                self._entries.pop(student_id, None)
+
+principal_cache = PrincipalCache(settings.STUDENT_PRINCIPAL_CACHE_SIZE, settings.STUDENT_PRINCIPAL_CACHE_SECONDS)
+
+def load_principal(db: Session, username: str) -> Optional[StudentPrincipal]:
+    """One probe of the unique username index."""
+    row = db.execute(
+        select(
+            models.StudentAccount.id,
+            models.StudentAccount.student_id,
+            models.StudentAccount.username,
+            models.StudentAccount.is_active,
+            models.StudentAccount.must_change_password,
+            models.StudentAccount.tokens_valid_after,
+        ).where(models.StudentAccount.username == username)
+    ).first()
+    if row is None:
+        return None
+    valid_after = row.tokens_valid_after
+    return StudentPrincipal(
+        student_id=row.student_id,
+        account_id=row.id,
+        username=row.username,
+        is_active=bool(row.is_active),
+        must_change_password=bool(row.must_change_password),
+        tokens_valid_after=(
+            calendar.timegm(valid_after.utctimetuple()) + valid_after.microsecond / 1e6 if valid_after else None
+        ),
+    )
+
+def find_login(db: Session, identifier: str) -> Optional[Row]:
+    """
+    Resolve a login identifier (index number or username) to the account fields the
+    login needs. Two probes that each hit a unique index, combined with UNION ALL,
+    instead of an OR across tables that neither index can serve.
+    """
+    columns = (
+        models.StudentAccount.id,
+        models.StudentAccount.student_id,
+        models.StudentAccount.username,
+        models.StudentAccount.hashed_password,
+        models.StudentAccount.is_active,
+        models.StudentAccount.must_change_password,
+        models.Student.first_name,
+        models.Student.last_name,
+        models.Student.index_number,
+    )
+    by_username = (
+        select(*columns)
+        .join(models.Student, models.Student.id == models.StudentAccount.student_id)
+        .where(models.StudentAccount.username == identifier)
+    )
+    by_index_number = (
+        select(*columns)
+        .join(models.Student, models.Student.id == models.StudentAccount.student_id)
+        .where(models.Student.index_number == identifier)
+    )
+    return db.execute(union_all(by_username, by_index_number).limit(1)).first()
+
+def get_current_principal(
+    db: Session = Depends(get_db),
+    token: str = Depends(reusable_oauth2)
+) -> StudentPrincipal:
+    """
+    Authenticate a student from the bearer token. Served from the principal cache
+    when possible; the session only opens a connection on a cache miss.
+    """
+    try:
+        payload = token_verifier.decode(token)
+        username: str = payload.get("sub")
+        student_id = payload.get("id")
+        if username is None or student_id is None or payload.get("type") != "student":
+            raise HTTPException(status_code=401, detail="Could not validate credentials")
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Could not validate credentials")
+
+    principal = principal_cache.get(student_id)
+    if principal is None:
+        principal = load_principal(db, username)
+        if principal is not None:
+            principal_cache.put(principal)
+
+    # The username must still belong to the student the token was issued for
+    if principal is None or principal.username != username or principal.student_id != student_id:
+        raise HTTPException(status_code=404, detail="Student not found")
+    if not principal.is_active:
+        raise HTTPException(status_code=401, detail="Account is inactive. Please contact admin.")
+    return principal
+
+REFRESH_TOKEN_TYPE = "student_refresh"
+
+def issue_refresh_token(principal: StudentPrincipal, family: Optional[str] = None) -> str:
+    """
+    A refresh token for `principal`. A login starts a new family; every rotation
+    stays in it, so replaying a spent token can revoke the whole chain.
+    """
+    return create_refresh_token({
+        "sub": principal.username,
+        "id": principal.student_id,
+        "type": REFRESH_TOKEN_TYPE,
+        "fam": family or secrets.token_urlsafe(16),
+    })
+
+def rotate_refresh_token(db: Session, refresh_token: str) -> Tuple[StudentPrincipal, str]:
+    """
+    Spend a refresh token: check its signature and revocation state, then return the
+    current principal and its replacement. Costs an HMAC check and one indexed
+    lookup; no password hashing. The account is always read from the database, not
+    the principal cache, so a password change in another worker is seen at once.
+    """
+    try:
+        # Refresh tokens are spent once; caching them would only evict access tokens
+        payload = token_verifier.decode(refresh_token, cache=False)
+    except JWTError:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    username = payload.get("sub")
+    student_id = payload.get("id")
+    jti, family = payload.get("jti"), payload.get("fam")
+    if payload.get("type") != REFRESH_TOKEN_TYPE or None in (username, student_id, jti, family):
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+
+    principal = load_principal(db, username)
+    if principal is None or principal.username != username or principal.student_id != student_id:
+        raise HTTPException(status_code=401, detail="Invalid refresh token")
+    principal_cache.put(principal)
+    if principal.tokens_valid_after is not None and float(payload.get("iat", 0)) <= principal.tokens_valid_after:
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    if revocation_store.family_revoked(family):
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+    if not revocation_store.mark_used(jti, payload["exp"] - time.time()):
+        # A spent token came back: someone holds a copy, so end the whole session
+        revocation_store.revoke_family(family, refresh_token_lifetime().total_seconds())
+        raise HTTPException(status_code=401, detail="Refresh token has been revoked")
+
+    if not principal.is_active:
+        raise HTTPException(status_code=401, detail="Account is inactive. Please contact admin.")
+
+    return principal, issue_refresh_token(principal, family)
+
+def revoke_sessions(db: Session, *student_ids: int) -> None:
+    """
+    End every refresh-token session issued so far to these students (password changes).
+    The cut-off is stored on the account, so it holds in every worker; the caller commits.
+    """
+    db.execute(
+        update(models.StudentAccount)
+        .where(models.StudentAccount.student_id.in_(student_ids))
+        .values(tokens_valid_after=datetime.utcnow())
+    )
@@ -0,0 +1,234 @@
+import csv
+import io
+import secrets
+import string
+import time
+from datetime import datetime
+from itertools import islice
+from typing import IO, Dict, Iterator, List, Optional
+from fastapi import HTTPException
+from pydantic import ValidationError
+from sqlalchemy import insert, select
+from sqlalchemy.orm import Session
+from app.core.logging import logger
+from app.core.security import hash_passwords
+from . import models
+from .schemas import GuardianCreate, StudentCreate, StudentMedicalCreate
+from .service import StudentService
+from ..admissions.service import AdmissionsService
+
+# Spreadsheet column -> schema field for the optional guardian and medical parts of a row
+GUARDIAN_COLUMNS = {
+    "guardian_name": "name",
+    "guardian_relationship": "relationship_type",
+    "guardian_phone": "phone",
+    "guardian_secondary_phone": "secondary_phone",
+    "guardian_email": "email",
+    "guardian_address": "address",
+    "guardian_occupation": "occupation",
+}
+GUARDIAN_FIELDS = {field: column for column, field in GUARDIAN_COLUMNS.items()}
+MEDICAL_COLUMNS = ("health_conditions", "allergies", "special_needs")
+
+def _clean(value) -> Optional[object]:
+    if isinstance(value, str):
+        value = value.strip()
+        return value or None
+    if isinstance(value, datetime):
+        return value.date()
+    return value
+
+def iter_csv_rows(file: IO[bytes]) -> Iterator[Dict[str, object]]:
+    reader = csv.DictReader(io.TextIOWrapper(file, encoding="utf-8-sig", newline=""))
+    for row in reader:
+        yield {(k or "").strip().lower(): _clean(v) for k, v in row.items()}
+
+def iter_xlsx_rows(file: IO[bytes]) -> Iterator[Dict[str, object]]:
+    try:
+        import openpyxl
+    except ImportError:
+        raise HTTPException(status_code=400, detail="XLSX import requires the 'openpyxl' package; upload a CSV instead")
+    # read_only streams rows from the sheet XML instead of building the whole workbook
+    workbook = openpyxl.load_workbook(file, read_only=True, data_only=True)
+    try:
+        rows = workbook.active.iter_rows(values_only=True)
+        header = [str(h or "").strip().lower() for h in next(rows, ())]
+        for values in rows:
+            if any(v is not None for v in values):
+                yield {k: _clean(v) for k, v in zip(header, values)}
+    finally:
+        workbook.close()
+
+class StudentImport:
+    """
+    Imports pupils (student, guardian, medical record and account) from an iterator
+    of spreadsheet rows. Rows are validated and written a chunk at a time: passwords
+    are hashed across the process pool, each table gets one multi-row INSERT, and the
+    chunk is committed, so memory stays bounded by the chunk size.
+    """
+
+    def __init__(self, db: Session, chunk_size: int, activate_accounts: bool):
+        self.db = db
+        self.chunk_size = chunk_size
+        self.activate_accounts = activate_accounts
+        self.rows = 0
+        self.imported = 0
+        self.errors: List[dict] = []
+        self.credentials: List[dict] = []
+
+    def run(self, rows: Iterator[Dict[str, object]]) -> dict:
+        started = time.perf_counter()
+        numbered = enumerate(rows, start=2) # row 1 is the header
+        while True:
+            chunk = list(islice(numbered, self.chunk_size))
+            if not chunk:
+                break
+            chunk_started = time.perf_counter()
+            imported = self._import_chunk(chunk)
+            self.rows += len(chunk)
+            self.imported += imported
+            logger.info(
+                "Student import: %d/%d rows imported from chunk in %.0f ms",
+                imported, len(chunk), (time.perf_counter() - chunk_started) * 1000
+            )
+
+        seconds = time.perf_counter() - started
+        self.errors.sort(key=lambda e: e["row"])
+        return {
+            "rows": self.rows,
+            "imported": self.imported,
+            "failed": self.rows - self.imported,
+            "seconds": round(seconds, 3),
+            "rows_per_second": round(self.imported / seconds, 1) if seconds else 0.0,
+            "errors": self.errors,
+            "credentials": self.credentials,
+        }
+
+    def _fail(self, row_number: int, errors: List[str]):
+        self.errors.append({"row": row_number, "errors": errors})
+
+    def _validate(self, row_number: int, row: Dict[str, object]) -> Optional[dict]:
+        errors: List[str] = []
+
+        def build(schema, values: dict, columns: Optional[Dict[str, str]] = None):
+            # Errors are reported against the spreadsheet column names
+            try:
+                return schema(**{k: v for k, v in values.items() if v is not None})
+            except ValidationError as e:
+                for err in e.errors():
+                    field = '.'.join(map(str, err['loc']))
+                    errors.append(f"{(columns or {}).get(field, field)}: {err['msg']}")
+
+        student = build(StudentCreate, {k: row.get(k) for k in StudentCreate.model_fields})
+        guardian = medical = None
+        if any(row.get(column) is not None for column in GUARDIAN_COLUMNS):
+            guardian = build(GuardianCreate, {field: row.get(column) for column, field in GUARDIAN_COLUMNS.items()}, GUARDIAN_FIELDS)
+        if any(row.get(column) is not None for column in MEDICAL_COLUMNS):
+            medical = build(StudentMedicalCreate, {column: row.get(column) for column in MEDICAL_COLUMNS})
+        if errors:
+            self._fail(row_number, errors)
+            return None
+        index_number = row.get("index_number")
+        return {
+            "row": row_number,
+            "student": student,
+            "guardian": guardian,
+            "medical": medical,
+            "index_number": str(index_number) if index_number is not None else None,
+            "username": str(row["username"]) if row.get("username") is not None else None,
+            "password": str(row["password"]) if row.get("password") is not None else None,
+        }
+
+    def _drop_duplicates(self, records: List[dict]) -> List[dict]:
+        """Reject rows whose index number or username is repeated in the chunk or already taken."""
+        index_numbers = [r["index_number"] for r in records if r["index_number"]]
+        usernames = [r["username"] for r in records if r["username"]]
+        taken_index = set(self.db.execute(
+            select(models.Student.index_number).where(models.Student.index_number.in_(index_numbers))
+        ).scalars()) if index_numbers else set()
+        taken_usernames = set(self.db.execute(
+            select(models.StudentAccount.username).where(models.StudentAccount.username.in_(usernames))
+        ).scalars()) if usernames else set()
+
+        kept = []
+        for record in records:
+            errors = []
+            if record["index_number"]:
+                if record["index_number"] in taken_index:
+                    errors.append(f"index_number: {record['index_number']} already exists")
+                taken_index.add(record["index_number"])
+            if record["username"]:
+                if record["username"] in taken_usernames:
+                    errors.append(f"username: {record['username']} already exists")
+                taken_usernames.add(record["username"])
+            if errors:
+                self._fail(record["row"], errors)
+            else:
+                kept.append(record)
+        return kept
+
+    def _import_chunk(self, chunk: List[tuple]) -> int:
+        records = [r for r in (self._validate(n, row) for n, row in chunk) if r is not None]
+        records = self._drop_duplicates(records)
+        if not records:
+            return 0
+
+        for record in records:
+            if record["password"] is None:
+                record["temp_password"] = ''.join(
+                    secrets.choice(string.ascii_letters + string.digits) for _ in range(8)
+                )
+        hashes = hash_passwords([r["password"] or r["temp_password"] for r in records])
+
+        db = self.db
+        try:
+            student_ids = db.execute(
+                insert(models.Student).returning(models.Student.id, sort_by_parameter_order=True),
+                [dict(r["student"].model_dump(), index_number=r["index_number"]) for r in records]
+            ).scalars().all()
+
+            guardians = [
+                dict(r["guardian"].model_dump(), student_id=sid)
+                for r, sid in zip(records, student_ids) if r["guardian"]
+            ]
+            if guardians:
+                db.execute(insert(models.Guardian), guardians)
+            medicals = [
+                dict(r["medical"].model_dump(), student_id=sid)
+                for r, sid in zip(records, student_ids) if r["medical"]
+            ]
+            if medicals:
+                db.execute(insert(models.StudentMedical), medicals)
+
+            accounts = []
+            for record, sid, hashed in zip(records, student_ids, hashes):
+                # Same scheme as admission-created accounts
+                record["username"] = record["username"] or f"std_{sid}_{secrets.choice(string.digits)}{secrets.choice(string.digits)}"
+                accounts.append({
+                    "student_id": sid,
+                    "username": record["username"],
+                    "hashed_password": hashed,
+                    "must_change_password": True,
+                    "is_active": self.activate_accounts,
+                })
+            db.execute(insert(models.StudentAccount), accounts)
+            # Keep the index number allocator ahead of imported SCH/... numbers
+            AdmissionsService.reserve_index_numbers(db, [r["index_number"] for r in records if r["index_number"]])
+            StudentService.refresh_enrollments(db, student_ids)
+            db.commit()
+        except Exception as e:
+            db.rollback()
+            logger.exception("Student import chunk of %d rows failed", len(records))
+            for record in records:
+                self._fail(record["row"], [f"Chunk failed to import: {e}"])
+            return 0
+
+        for record, sid in zip(records, student_ids):
+            if "temp_password" in record:
+                self.credentials.append({
+                    "row": record["row"],
+                    "student_id": sid,
+                    "username": record["username"],
+                    "temp_password": record["temp_password"],
+                })
+        return len(records)
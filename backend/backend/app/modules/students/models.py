@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, Date, Enum as SqlEnum, ForeignKey, DateTime, Boolean, Text
+from sqlalchemy import Column, Integer, String, Date, Enum as SqlEnum, ForeignKey, DateTime, Boolean, Text, Index, event
 from sqlalchemy.orm import relationship
 import enum
 from typing import Optional
@@ -10,6 +10,11 @@ class Gender(str, enum.Enum):
     MALE = "Male"
     FEMALE = "Female"
 
+class EnrollmentStatus(str, enum.Enum):
+    ACTIVE = "Active"
+    PENDING = "Pending Approval"
+    INACTIVE = "Inactive"
+
 class Student(Base):
     id = Column(Integer, primary_key=True, index=True)
     index_number = Column(String, unique=True, index=True, nullable=True)
@@ -30,38 +35,67 @@ class Student(Base):
     medical = relationship("StudentMedical", back_populates="student", uselist=False, cascade="all, delete-orphan")
     account = relationship("StudentAccount", back_populates="student", uselist=False, cascade="all, delete-orphan")
     admissions = relationship("Admission", back_populates="student")
+    enrollment = relationship("StudentEnrollment", back_populates="student", uselist=False, cascade="all, delete-orphan")
+    # pg_trgm GIN indexes for search live outside the model; see app.core.search.TRIGRAM_INDEXES
+
+    def latest_approved_admission(self):
+        """
+        Most recent approved admission, found in a single pass and memoized on the
+        instance so the enrollment properties below don't each re-sort admissions.
+        The memo is dropped whenever the instance is expired or refreshed.
+        """
+        if "_latest_approved_admission" not in self.__dict__:
+            approved = [a for a in self.admissions if a.status == AdmissionStatus.APPROVED]
+            self.__dict__["_latest_approved_admission"] = max(
+                approved, key=lambda x: x.created_at, default=None
+            )
+        return self.__dict__["_latest_approved_admission"]
+
+    # Enrollment properties read the maintained StudentEnrollment projection and only
+    # fall back to scanning admissions for students that don't have a row yet.
+
+    @property
+    def _active_enrollment(self):
+        if self.enrollment and self.enrollment.status == EnrollmentStatus.ACTIVE:
+            return self.enrollment
+        return None
 
     @property
     def current_class(self) -> str:
-        # Get latest approved admission
-        if not self.admissions: return "N/A"
-        latest_adm = next((a for a in sorted(self.admissions, key=lambda x: x.created_at, reverse=True) 
-                          if a.status == "APPROVED"), None)
+        if self.enrollment:
+            enrollment = self._active_enrollment
+            return enrollment.class_room.name if enrollment and enrollment.class_room else "N/A"
+        latest_adm = self.latest_approved_admission()
         return latest_adm.class_room.name if latest_adm else "N/A"
 
     @property
     def class_id(self) -> Optional[int]:
-        if not self.admissions: return None
-        latest_adm = next((a for a in sorted(self.admissions, key=lambda x: x.created_at, reverse=True) 
-                          if a.status == "APPROVED"), None)
+        if self.enrollment:
+            enrollment = self._active_enrollment
+            return enrollment.class_id if enrollment else None
+        latest_adm = self.latest_approved_admission()
         return latest_adm.class_id if latest_adm else None
 
     @property
     def stream_id(self) -> Optional[int]:
-        if not self.admissions: return None
-        latest_adm = next((a for a in sorted(self.admissions, key=lambda x: x.created_at, reverse=True) 
-                          if a.status == "APPROVED"), None)
+        if self.enrollment:
+            enrollment = self._active_enrollment
+            return enrollment.stream_id if enrollment else None
+        latest_adm = self.latest_approved_admission()
         return latest_adm.stream_id if latest_adm else None
 
     @property
     def current_stream(self) -> str:
-        if not self.admissions: return "N/A"
-        latest_adm = next((a for a in sorted(self.admissions, key=lambda x: x.created_at, reverse=True) 
-                          if a.status == "APPROVED"), None)
+        if self.enrollment:
+            enrollment = self._active_enrollment
+            return enrollment.stream.name if enrollment and enrollment.stream else "N/A"
+        latest_adm = self.latest_approved_admission()
         return latest_adm.stream.name if latest_adm and latest_adm.stream else "N/A"
 
     @property
     def status(self) -> str:
+        if self.enrollment:
+            return self.enrollment.status.value
         if not self.admissions: return "Inactive"
         # Check if there's any approved admission
         has_approved = any(a.status == AdmissionStatus.APPROVED for a in self.admissions)
@@ -74,17 +108,60 @@ class Student(Base):
 
     @property
     def pending_admission_id(self) -> Optional[int]:
+        if self.enrollment:
+            return self.enrollment.pending_admission_id
         if not self.admissions: return None
         pending = next((a for a in self.admissions if a.status == AdmissionStatus.PENDING), None)
         return pending.id if pending else None
 
     @property
     def admission_year(self) -> str:
-        if not self.admissions: return "N/A"
-        latest_adm = next((a for a in sorted(self.admissions, key=lambda x: x.created_at, reverse=True) 
-                          if a.status == "APPROVED"), None)
+        if self.enrollment:
+            enrollment = self._active_enrollment
+            return enrollment.academic_year.name if enrollment and enrollment.academic_year else "N/A"
+        latest_adm = self.latest_approved_admission()
         return latest_adm.academic_year_name if latest_adm else "N/A"
 
+@event.listens_for(Student, "expire")
+def _clear_enrollment_memo(target, attrs):
+    # target is None when the instance was already garbage collected
+    if target is not None:
+        target.__dict__.pop("_latest_approved_admission", None)
+
+@event.listens_for(Student, "refresh")
+def _clear_enrollment_memo_on_refresh(target, context, attrs):
+    if target is not None:
+        target.__dict__.pop("_latest_approved_admission", None)
+
+class StudentEnrollment(Base):
+    """
+    Maintained projection of a student's current enrollment, one row per student.
+    Kept in step with admissions by StudentService.refresh_enrollment so rosters and
+    status filters are indexed lookups instead of scans over admissions.
+
+    The class/stream/year columns come from the latest approved admission, or the
+    latest pending one while the student is awaiting approval.
+    """
+    student_id = Column(Integer, ForeignKey("student.id", ondelete="CASCADE"), primary_key=True)
+    admission_id = Column(Integer, ForeignKey("admission.id"), nullable=True)
+    status = Column(SqlEnum(EnrollmentStatus), nullable=False, default=EnrollmentStatus.INACTIVE)
+    class_id = Column(Integer, ForeignKey("classroom.id"), nullable=True)
+    stream_id = Column(Integer, ForeignKey("stream.id"), nullable=True)
+    academic_year_id = Column(Integer, ForeignKey("academicyear.id"), nullable=True)
+    pending_admission_id = Column(Integer, nullable=True)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+
+    student = relationship("Student", back_populates="enrollment")
+    class_room = relationship("ClassRoom")
+    stream = relationship("Stream")
+    academic_year = relationship("AcademicYear")
+
+    __table_args__ = (
+        Index("ix_studentenrollment_class_id_status", "class_id", "status"),
+        Index("ix_studentenrollment_academic_year_id_status", "academic_year_id", "status"),
+        Index("ix_studentenrollment_status", "status"),
+    )
+
 class Guardian(Base):
     id = Column(Integer, primary_key=True, index=True)
     student_id = Column(Integer, ForeignKey("student.id", ondelete="CASCADE"), nullable=False)
@@ -109,10 +186,12 @@ class StudentMedical(Base):
 
 class StudentAccount(Base):
     id = Column(Integer, primary_key=True, index=True)
-    student_id = Column(Integer, ForeignKey("student.id", ondelete="CASCADE"), nullable=False)
+    student_id = Column(Integer, ForeignKey("student.id", ondelete="CASCADE"), nullable=False, index=True)
     username = Column(String, unique=True, index=True, nullable=False)
     hashed_password = Column(String, nullable=False)
     must_change_password = Column(Boolean, default=True)
     is_active = Column(Boolean, default=False)
+    # Refresh tokens issued at or before this (UTC) are revoked; set on password changes
+    tokens_valid_after = Column(DateTime, nullable=True)
 
     student = relationship("Student", back_populates="account")
@@ -1,37 +1,27 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File
+from fastapi.responses import StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
-from app.db.session import get_db
-from fastapi.security import OAuth2PasswordBearer
+from app.db.session import get_db, get_read_db
 from . import schemas, models
-from app.core.security import verify_password, get_password_hash, create_access_token
+from .service import StudentService
+from .importer import StudentImport, iter_csv_rows, iter_xlsx_rows
+from .auth import (
+    StudentPrincipal, find_login, get_current_principal, issue_refresh_token,
+    principal_cache, principal_claims, revoke_sessions, rotate_refresh_token
+)
+from app.core.constants import DEFAULT_PAGE_SIZE, MAX_PAGE_SIZE
+from app.core.security import verify_password, verify_password_offloaded, get_password_hash, create_access_token
 from app.core.config import settings
-from jose import jwt, JWTError
+from app.core.export import ExportFormat, EXPORT_MEDIA_TYPES, require_format, stream_export
 
 router = APIRouter()
 
-reusable_oauth2 = OAuth2PasswordBearer(
-    tokenUrl=f"{settings.API_V1_STR}/students/login"
-)
-
 def get_current_student(
-    db: Session = Depends(get_db),
-    token: str = Depends(reusable_oauth2)
+    principal: StudentPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
 ) -> models.Student:
-    try:
-        payload = jwt.decode(
-            token, settings.SECRET_KEY, algorithms=[settings.ALGORITHM]
-        )
-        username: str = payload.get("sub")
-        if username is None:
-            raise HTTPException(status_code=401, detail="Could not validate credentials")
-    except JWTError:
-        raise HTTPException(status_code=401, detail="Could not validate credentials")
-    
-    student = db.query(models.Student).filter(
-        models.Student.account.has(username=username)
-    ).first()
-    
+    student = db.get(models.Student, principal.student_id)
     if not student:
         raise HTTPException(status_code=404, detail="Student not found")
     return student
@@ -42,30 +32,48 @@ def student_login(
     db: Session = Depends(get_db)
 ):
     # Search by index_number OR username
-    student = db.query(models.Student).filter(
-        (models.Student.index_number == obj_in.username) |
-        (models.Student.account.has(username=obj_in.username))
-    ).first()
+    account = find_login(db, obj_in.username)
 
-    if not student or not student.account:
+    # Always pay for one hash check, even for unknown users, so timing doesn't reveal them
+    if not verify_password_offloaded(obj_in.password, account.hashed_password if account else None):
         raise HTTPException(status_code=401, detail="Invalid credentials")
-    
-    if not student.account.is_active:
-        raise HTTPException(status_code=401, detail="Account is inactive. Please contact admin.")
 
-    if not verify_password(obj_in.password, student.account.hashed_password):
-        raise HTTPException(status_code=401, detail="Invalid credentials")
+    if not account.is_active:
+        raise HTTPException(status_code=401, detail="Account is inactive. Please contact admin.")
 
-    access_token = create_access_token(
-        data={"sub": student.account.username, "id": student.id, "type": "student"}
+    principal = StudentPrincipal(
+        student_id=account.student_id,
+        account_id=account.id,
+        username=account.username,
+        is_active=account.is_active,
+        must_change_password=account.must_change_password
     )
+    access_token = create_access_token(data=principal_claims(principal))
     
     return {
         "access_token": access_token,
+        "refresh_token": issue_refresh_token(principal),
         "token_type": "bearer",
-        "must_change_password": student.account.must_change_password,
-        "student_name": f"{student.first_name} {student.last_name}",
-        "index_number": student.index_number or "N/A"
+        "must_change_password": account.must_change_password,
+        "student_name": f"{account.first_name} {account.last_name}",
+        "index_number": account.index_number or "N/A"
+    }
+
+@router.post("/token/refresh", response_model=schemas.TokenRefresh)
+def refresh_student_token(
+    obj_in: schemas.TokenRefreshRequest,
+    db: Session = Depends(get_db)
+):
+    """
+    Exchange a refresh token for a new access token and a new refresh token. Each
+    refresh token works once; presenting a spent one revokes the session.
+    """
+    principal, refresh_token = rotate_refresh_token(db, obj_in.refresh_token)
+    return {
+        "access_token": create_access_token(data=principal_claims(principal)),
+        "refresh_token": refresh_token,
+        "token_type": "bearer",
+        "must_change_password": principal.must_change_password
     }
 
 @router.post("/change-password")
@@ -79,15 +87,21 @@ def change_password(
     
     current_student.account.hashed_password = get_password_hash(obj_in.new_password)
     current_student.account.must_change_password = False
+    revoke_sessions(db, current_student.id)
     
     db.commit()
+    principal_cache.invalidate(current_student.id)
     return {"message": "Password changed successfully", "success": True}
 
 @router.get("/me/profile", response_model=schemas.StudentResponse)
 def get_my_profile(
-    current_student: models.Student = Depends(get_current_student)
+    principal: StudentPrincipal = Depends(get_current_principal),
+    db: Session = Depends(get_db)
 ):
-    return current_student
+    student = StudentService.get_profile(db, principal.student_id)
+    if not student:
+        raise HTTPException(status_code=404, detail="Student not found")
+    return student
 
 @router.get("/", response_model=List[schemas.StudentResponse])
 def list_students(
@@ -95,42 +109,68 @@ def list_students(
     status: Optional[str] = None,
     academic_year_id: Optional[int] = None,
     class_id: Optional[int] = None,
-    db: Session = Depends(get_db)
+    page: Optional[int] = Query(None, ge=1),
+    size: int = Query(DEFAULT_PAGE_SIZE, ge=1, le=MAX_PAGE_SIZE),
+    db: Session = Depends(get_read_db)
 ):
-    from sqlalchemy.orm import joinedload
-    from app.modules.admissions.models import Admission, AdmissionStatus
-    
-    query = db.query(models.Student).options(
-        joinedload(models.Student.admissions).joinedload(Admission.class_room),
-        joinedload(models.Student.admissions).joinedload(Admission.academic_year),
-        joinedload(models.Student.admissions).joinedload(Admission.stream)
+    return StudentService.list_students(
+        db, search=search, status=status, academic_year_id=academic_year_id,
+        class_id=class_id, page=page, size=size
     )
 
-    if search:
-        search_filter = f"%{search}%"
-        query = query.filter(
-            (models.Student.first_name.ilike(search_filter)) |
-            (models.Student.last_name.ilike(search_filter)) |
-            (models.Student.index_number.ilike(search_filter))
-        )
-
-    # Note: Status, Academic Year, and Class filtering requires joining with Admissions
-    if any([status, academic_year_id, class_id]):
-        query = query.join(models.Student.admissions)
-        
-        if status:
-            if status == "Active":
-                query = query.filter(Admission.status == AdmissionStatus.APPROVED)
-            elif status == "Pending Approval":
-                query = query.filter(Admission.status == AdmissionStatus.PENDING)
-        
-        if academic_year_id:
-            query = query.filter(Admission.academic_year_id == academic_year_id)
-        
-        if class_id:
-            query = query.filter(Admission.class_id == class_id)
+# Columns of the roster export, in order
+EXPORT_COLUMNS = [
+    "id", "index_number", "first_name", "middle_name", "last_name", "gender",
+    "date_of_birth", "nationality", "address", "city", "status",
+    "current_class", "current_stream", "admission_year", "guardians", "created_at",
+]
 
-    return query.all()
+@router.get("/export")
+def export_students(
+    format: ExportFormat = ExportFormat.CSV,
+    search: Optional[str] = None,
+    status: Optional[str] = None,
+    academic_year_id: Optional[int] = None,
+    class_id: Optional[int] = None
+):
+    """
+    Stream the student roster, with guardians and current enrollment, using the
+    same filters as the listing.
+    """
+    # TODO: Add admin permission check
+    require_format(format)
+    rows = StudentService.export_students(
+        search=search, status=status, academic_year_id=academic_year_id, class_id=class_id
+    )
+    return StreamingResponse(
+        stream_export(rows, EXPORT_COLUMNS, format),
+        media_type=EXPORT_MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="students.{format.value}"'}
+    )
+
+@router.post("/import", response_model=schemas.StudentImportResult)
+def import_students(
+    file: UploadFile = File(...),
+    format: Optional[schemas.StudentImportFormat] = None,
+    activate_accounts: bool = True,
+    chunk_size: int = Query(settings.STUDENT_IMPORT_CHUNK_SIZE, ge=1, le=5000),
+    db: Session = Depends(get_db)
+):
+    """
+    Bulk-import existing pupils from a CSV or XLSX sheet (one row per pupil, with
+    optional guardian_* and medical columns). Valid rows are imported even when
+    others fail; the result lists row-level errors and any generated passwords.
+    """
+    # TODO: Add admin permission check
+    if format is None:
+        extension = (file.filename or "").rsplit(".", 1)[-1].lower()
+        try:
+            format = schemas.StudentImportFormat(extension)
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Unsupported file type; upload a .csv or .xlsx file")
+    # The upload is spooled to disk, so rows are read lazily rather than all at once
+    rows = iter_csv_rows(file.file) if format == schemas.StudentImportFormat.CSV else iter_xlsx_rows(file.file)
+    return StudentImport(db, chunk_size=chunk_size, activate_accounts=activate_accounts).run(rows)
 
 @router.get("/{student_id}", response_model=schemas.StudentResponse)
 def get_student(
@@ -171,6 +211,7 @@ def update_student(
             if stream_id is not None:
                 latest_adm.stream_id = stream_id
             db.add(latest_adm)
+            StudentService.refresh_enrollment(db, student_id)
 
     for field, value in update_data.items():
         setattr(student, field, value)
@@ -191,6 +232,8 @@ def reset_student_password(
     
     student.account.hashed_password = get_password_hash(obj_in.new_password)
     student.account.must_change_password = True
+    revoke_sessions(db, student.id)
     
     db.commit()
+    principal_cache.invalidate(student.id)
     return {"message": "Password reset successfully", "success": True}
@@ -1,6 +1,7 @@
 from pydantic import BaseModel, EmailStr
 from datetime import date, datetime
 from typing import Optional, List
+import enum
 from .models import Gender
 
 class GuardianBase(BaseModel):
@@ -75,6 +76,16 @@ class Token(BaseModel):
     must_change_password: bool
     student_name: str
     index_number: str
+    refresh_token: Optional[str] = None
+
+class TokenRefreshRequest(BaseModel):
+    refresh_token: str
+
+class TokenRefresh(BaseModel):
+    access_token: str
+    refresh_token: str
+    token_type: str
+    must_change_password: bool
 
 class StudentBase(BaseModel):
     first_name: str
@@ -125,3 +136,26 @@ class StudentResponse(StudentBase):
 
     class Config:
         from_attributes = True
+
+class StudentImportFormat(str, enum.Enum):
+    CSV = "csv"
+    XLSX = "xlsx"
+
+class StudentImportRowError(BaseModel):
+    row: int # spreadsheet row number, header is row 1
+    errors: List[str]
+
+class StudentImportCredential(BaseModel):
+    row: int
+    student_id: int
+    username: str
+    temp_password: str
+
+class StudentImportResult(BaseModel):
+    rows: int
+    imported: int
+    failed: int
+    seconds: float
+    rows_per_second: float
+    errors: List[StudentImportRowError]
+    credentials: List[StudentImportCredential] # generated passwords, only returned once
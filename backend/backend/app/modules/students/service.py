@@ -1 +1,233 @@
-# Placeholder for service.py in students module
+from collections import defaultdict
+from itertools import groupby
+from sqlalchemy import select
+from sqlalchemy.orm import Session, Query, joinedload, selectinload
+from typing import Dict, Iterator, List, Optional
+from app.core.constants import MAX_PAGE_SIZE
+from app.core.export import EXPORT_BATCH_SIZE
+from app.core.search import text_search
+from app.db.session import ReadSessionLocal
+from . import models
+from ..admissions.models import Admission, AdmissionStatus
+from ..academics.models import AcademicYear, ClassRoom, Stream
+
+# Every relationship StudentResponse touches, loaded with one IN query each
+# so a listing costs a fixed number of statements regardless of row count.
+STUDENT_RESPONSE_LOAD = (
+    selectinload(models.Student.guardians),
+    selectinload(models.Student.medical),
+    selectinload(models.Student.account),
+    selectinload(models.Student.enrollment).selectinload(models.StudentEnrollment.class_room),
+    selectinload(models.Student.enrollment).selectinload(models.StudentEnrollment.academic_year),
+    selectinload(models.Student.enrollment).selectinload(models.StudentEnrollment.stream),
+)
+
+# The same graph as STUDENT_RESPONSE_LOAD, joined into a single statement for one student
+STUDENT_PROFILE_LOAD = (
+    joinedload(models.Student.guardians),
+    joinedload(models.Student.medical),
+    joinedload(models.Student.account),
+    joinedload(models.Student.enrollment).joinedload(models.StudentEnrollment.class_room),
+    joinedload(models.Student.enrollment).joinedload(models.StudentEnrollment.academic_year),
+    joinedload(models.Student.enrollment).joinedload(models.StudentEnrollment.stream),
+)
+
+ENROLLMENT_STATUS_FILTERS = {
+    "Active": models.EnrollmentStatus.ACTIVE,
+    "Pending Approval": models.EnrollmentStatus.PENDING,
+}
+
+# Guardian columns of the roster export projection -> keys of each exported guardian
+GUARDIAN_EXPORT_FIELDS = {
+    "guardian_name": "name",
+    "guardian_relationship": "relationship_type",
+    "guardian_phone": "phone",
+    "guardian_email": "email",
+}
+
+class StudentService:
+    @staticmethod
+    def search(db: Session, term: str):
+        return text_search(
+            db, [models.Student.first_name, models.Student.last_name, models.Student.index_number], term
+        )
+
+    @staticmethod
+    def get_profile(db: Session, student_id: int) -> Optional[models.Student]:
+        return db.execute(
+            select(models.Student).options(*STUDENT_PROFILE_LOAD).where(models.Student.id == student_id)
+        ).unique().scalar_one_or_none()
+
+    @staticmethod
+    def filtered_query(
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        academic_year_id: Optional[int] = None,
+        class_id: Optional[int] = None
+    ) -> Query:
+        query = db.query(models.Student)
+        # Status, class and year filters are indexed lookups on the enrollment projection
+        if any([status, academic_year_id, class_id]):
+            query = query.join(models.Student.enrollment)
+        return query.filter(*StudentService.filter_clauses(db, search, status, academic_year_id, class_id))
+
+    @staticmethod
+    def filter_clauses(
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        academic_year_id: Optional[int] = None,
+        class_id: Optional[int] = None
+    ) -> list:
+        """WHERE clauses for the student filters; enrollment ones need StudentEnrollment joined."""
+        clauses = []
+        if search:
+            search_filter, _ = StudentService.search(db, search)
+            clauses.append(search_filter)
+        if status in ENROLLMENT_STATUS_FILTERS:
+            clauses.append(models.StudentEnrollment.status == ENROLLMENT_STATUS_FILTERS[status])
+        if academic_year_id:
+            clauses.append(models.StudentEnrollment.academic_year_id == academic_year_id)
+        if class_id:
+            clauses.append(models.StudentEnrollment.class_id == class_id)
+        return clauses
+
+    @staticmethod
+    def export_students(
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        academic_year_id: Optional[int] = None,
+        class_id: Optional[int] = None
+    ) -> Iterator[dict]:
+        """
+        Yield the roster with guardians and current enrollment, one dict per student.
+        One joined SELECT read through a server-side cursor, ordered so each student's
+        guardian rows arrive together. Owns its session because it keeps running
+        after the request handler returns.
+        """
+        db = ReadSessionLocal()
+        try:
+            query = (
+                select(
+                    models.Student.id,
+                    models.Student.index_number,
+                    models.Student.first_name,
+                    models.Student.middle_name,
+                    models.Student.last_name,
+                    models.Student.gender,
+                    models.Student.date_of_birth,
+                    models.Student.nationality,
+                    models.Student.address,
+                    models.Student.city,
+                    models.Student.created_at,
+                    models.StudentEnrollment.status,
+                    ClassRoom.name.label("current_class"),
+                    Stream.name.label("current_stream"),
+                    AcademicYear.name.label("admission_year"),
+                    models.Guardian.name.label("guardian_name"),
+                    models.Guardian.relationship_type.label("guardian_relationship"),
+                    models.Guardian.phone.label("guardian_phone"),
+                    models.Guardian.email.label("guardian_email"),
+                )
+                .select_from(models.Student)
+                .outerjoin(models.StudentEnrollment, models.StudentEnrollment.student_id == models.Student.id)
+                .outerjoin(ClassRoom, models.StudentEnrollment.class_id == ClassRoom.id)
+                .outerjoin(Stream, models.StudentEnrollment.stream_id == Stream.id)
+                .outerjoin(AcademicYear, models.StudentEnrollment.academic_year_id == AcademicYear.id)
+                .outerjoin(models.Guardian, models.Guardian.student_id == models.Student.id)
+                .where(*StudentService.filter_clauses(db, search, status, academic_year_id, class_id))
+                .order_by(models.Student.id, models.Guardian.id)
+                .execution_options(yield_per=EXPORT_BATCH_SIZE)
+            )
+            for _, rows in groupby(db.execute(query), key=lambda row: row.id):
+                rows = list(rows)
+                student = {k: v for k, v in rows[0]._mapping.items() if k not in GUARDIAN_EXPORT_FIELDS}
+                student["guardians"] = [
+                    {field: getattr(row, column) for column, field in GUARDIAN_EXPORT_FIELDS.items()}
+                    for row in rows if row.guardian_name is not None
+                ]
+                status = student["status"] or models.EnrollmentStatus.INACTIVE
+                student["status"] = status.value
+                # Placement only counts while the enrollment is active, as on Student
+                for field in ("current_class", "current_stream", "admission_year"):
+                    if status != models.EnrollmentStatus.ACTIVE or student[field] is None:
+                        student[field] = "N/A"
+                yield student
+        finally:
+            db.close()
+
+    @staticmethod
+    def list_students(
+        db: Session,
+        search: Optional[str] = None,
+        status: Optional[str] = None,
+        academic_year_id: Optional[int] = None,
+        class_id: Optional[int] = None,
+        page: Optional[int] = None,
+        size: int = MAX_PAGE_SIZE
+    ) -> List[models.Student]:
+        order_by = [models.Student.id]
+        if search:
+            # Best matches first when searching
+            _, rank = StudentService.search(db, search)
+            order_by.insert(0, rank.desc())
+
+        query = StudentService.filtered_query(
+            db, search, status, academic_year_id, class_id
+        ).options(*STUDENT_RESPONSE_LOAD).order_by(*order_by)
+
+        if page:
+            query = query.offset((page - 1) * size).limit(size)
+        return query.all()
+
+    @staticmethod
+    def refresh_enrollment(db: Session, student_id: int) -> models.StudentEnrollment:
+        """
+        Recompute a student's enrollment projection from their admissions. Runs inside
+        the caller's transaction; pending changes are flushed first so they're seen.
+        """
+        return StudentService.refresh_enrollments(db, [student_id])[student_id]
+
+    @staticmethod
+    def refresh_enrollments(db: Session, student_ids: List[int]) -> Dict[int, models.StudentEnrollment]:
+        """Set-based refresh_enrollment: two SELECTs however many students are given."""
+        db.flush()
+        student_ids = list(set(student_ids))
+        admissions_by_student: Dict[int, List[Admission]] = defaultdict(list)
+        for admission in db.query(Admission).filter(Admission.student_id.in_(student_ids)):
+            admissions_by_student[admission.student_id].append(admission)
+        enrollments = {
+            e.student_id: e for e in
+            db.query(models.StudentEnrollment).filter(models.StudentEnrollment.student_id.in_(student_ids))
+        }
+
+        for student_id in student_ids:
+            admissions = admissions_by_student[student_id]
+            approved = [a for a in admissions if a.status == AdmissionStatus.APPROVED]
+            pending = [a for a in admissions if a.status == AdmissionStatus.PENDING]
+
+            latest_approved = max(approved, key=lambda a: a.created_at, default=None)
+            latest_pending = max(pending, key=lambda a: a.created_at, default=None)
+            current = latest_approved or latest_pending
+
+            if latest_approved:
+                status = models.EnrollmentStatus.ACTIVE
+            elif latest_pending:
+                status = models.EnrollmentStatus.PENDING
+            else:
+                status = models.EnrollmentStatus.INACTIVE
+
+            enrollment = enrollments.get(student_id)
+            if enrollment is None:
+                enrollment = models.StudentEnrollment(student_id=student_id)
+                db.add(enrollment)
+                enrollments[student_id] = enrollment
+
+            enrollment.status = status
+            enrollment.admission_id = current.id if current else None
+            enrollment.class_id = current.class_id if current else None
+            enrollment.stream_id = current.stream_id if current else None
+            enrollment.academic_year_id = current.academic_year_id if current else None
+            enrollment.pending_admission_id = pending[0].id if pending else None
+        return enrollments
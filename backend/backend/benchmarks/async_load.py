@@ -0,0 +1,128 @@
+"""
+Throughput of the ported voucher endpoints with DB_ASYNC off (threadpool + psycopg2)
+and on (event loop + asyncpg), under concurrent load.
+
+    python -m benchmarks.async_load --url postgresql+psycopg2://.../scratch --concurrency 200
+
+Use a scratch database: the schema is created, seeded with reserved vouchers and
+dropped again. Each mode runs the app in its own uvicorn process on --port; the
+verify throttles are lifted so every request reaches the database.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import statistics
+import subprocess
+import sys
+import time
+import uuid
+from datetime import datetime, timedelta
+from benchmarks.common import use_database
+
+async def wait_until_up(client, process) -> None:
+    for _ in range(100):
+        if process.poll() is not None:
+            raise RuntimeError("uvicorn exited during startup")
+        try:
+            if (await client.get("/health")).status_code == 200:
+                return
+        except Exception: # not listening yet
+            pass
+        await asyncio.sleep(0.1)
+    raise RuntimeError("uvicorn did not come up")
+
+async def load(base_url: str, process, requests, concurrency: int, total: int):
+    import httpx
+
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=60) as client:
+        await wait_until_up(client, process)
+        latencies, failures = [], 0
+        position = iter(range(total))
+
+        async def worker():
+            nonlocal failures
+            for i in position:
+                method, path, body = requests[i % len(requests)]
+                started = time.perf_counter()
+                response = await client.request(method, path, json=body)
+                latencies.append(time.perf_counter() - started)
+                failures += response.status_code != 200
+
+        started = time.perf_counter()
+        await asyncio.gather(*[worker() for _ in range(concurrency)])
+        return time.perf_counter() - started, latencies, failures
+
+def run_mode(args, db_async: bool, requests) -> None:
+    env = dict(
+        os.environ, DATABASE_URL=args.url, DB_ASYNC=str(db_async).lower(), WEB_CONCURRENCY="1", LOG_LEVEL="WARNING",
+        VOUCHER_VERIFY_IP_LIMIT="1000000000", VOUCHER_VERIFY_NUMBER_LIMIT="1000000000",
+    )
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(args.port), "--log-level", "warning"],
+        env=env, cwd=os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    )
+    try:
+        elapsed, latencies, failures = asyncio.run(
+            load(f"http://127.0.0.1:{args.port}", process, requests, args.concurrency, args.requests)
+        )
+    finally:
+        process.terminate()
+        process.wait()
+    ordered = sorted(latencies)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{'DB_ASYNC=' + str(db_async).lower():<16} {len(latencies) / elapsed:9.1f} req/s"
+        f"  median={statistics.median(latencies) * 1e3:8.2f}ms  p95={p95 * 1e3:8.2f}ms  non-200={failures}"
+    )
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="scratch Postgres database URL")
+    parser.add_argument("--vouchers", type=int, default=1000, help="reserved vouchers to check sessions against")
+    parser.add_argument("--requests", type=int, default=5000, help="requests per mode")
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    use_database(args.url)
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+
+    from sqlalchemy import insert
+    from app.db.base import Base
+    from app.db.session import engine
+    from app.modules.academics.models import AcademicYear
+    from app.modules.evoucher.models import EVoucher, VoucherStatus
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    try:
+        now = datetime.utcnow()
+        tokens = [str(uuid.uuid4()) for _ in range(args.vouchers)]
+        with engine.begin() as connection:
+            year_id = connection.execute(insert(AcademicYear).values(name="2026/2027").returning(AcademicYear.id)).scalar_one()
+            connection.execute(insert(EVoucher), [
+                {
+                    "voucher_number": f"LOAD{i:06d}", "pin_hash": "x", "academic_year_id": year_id,
+                    "status": VoucherStatus.RESERVED, "reserved_session_id": token,
+                    "reserved_at": now, "expires_at": now + timedelta(days=1),
+                }
+                for i, token in enumerate(tokens)
+            ])
+
+        # Mostly session checks (served from the cache after the first hit) with
+        # unknown-number verifies mixed in (lookup + attempt log, no PIN hash)
+        requests = []
+        for i, token in enumerate(tokens):
+            requests.append(("GET", f"/api/v1/evoucher/check-session/{token}", None))
+            if i % 4 == 0:
+                requests.append(("POST", "/api/v1/evoucher/verify", {"voucher_number": f"MISS{i:06d}", "pin": "000000"}))
+
+        print(f"{args.requests} requests per mode, concurrency {args.concurrency}, {args.vouchers} sessions")
+        for db_async in (False, True):
+            run_mode(args, db_async, requests)
+    finally:
+        Base.metadata.drop_all(engine)
+
+if __name__ == "__main__":
+    main()
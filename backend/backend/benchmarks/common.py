@@ -0,0 +1,29 @@
+import os
+import statistics
+import sys
+import time
+from typing import Callable, List
+
+# Benchmarks import the app, which builds its engines from settings at import time
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+def use_database(url: str) -> None:
+    """Point the app's settings at `url`; call before importing anything from app."""
+    os.environ["DATABASE_URL"] = url
+
+def timed(fn: Callable[[], object], repeat: int) -> List[float]:
+    samples = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        fn()
+        samples.append(time.perf_counter() - started)
+    return samples
+
+def report(label: str, samples: List[float], unit: str = "ms") -> None:
+    scale = {"ms": 1e3, "us": 1e6}[unit]
+    ordered = sorted(samples)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    print(
+        f"{label:<40} n={len(samples):<7} median={statistics.median(samples) * scale:10.2f}{unit}"
+        f"  p95={p95 * scale:10.2f}{unit}"
+    )
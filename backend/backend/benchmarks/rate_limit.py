@@ -0,0 +1,59 @@
+"""
+Cost of the voucher-verify throttle, in-process (no database needed).
+
+    python -m benchmarks.rate_limit --keys 10000
+
+Times the rejection path (limiter check that raises 429) and the allowed path,
+and the same rejection through the ASGI app to show it happens before any DB or
+PIN-hash work.
+"""
+import argparse
+import logging
+from benchmarks.common import report, timed, use_database
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--keys", type=int, default=10000, help="distinct client IPs already tracked")
+    parser.add_argument("--repeat", type=int, default=100000)
+    args = parser.parse_args()
+    use_database("sqlite://")
+
+    from fastapi import HTTPException
+    from fastapi.testclient import TestClient
+    from app.core.rate_limit import LocalRateLimitBackend, SlidingWindowLimiter, enforce
+    from app.main import app
+    from app.modules.evoucher.router import verify_ip_limiter
+
+    limiter = SlidingWindowLimiter("bench", 30, 300, LocalRateLimitBackend(args.keys * 2))
+    for i in range(args.keys):
+        limiter.allow(f"10.0.{i // 256}.{i % 256}")
+    for _ in range(limiter.limit):
+        limiter.allow("203.0.113.7")
+
+    def rejected():
+        try:
+            enforce(limiter, "203.0.113.7")
+        except HTTPException:
+            return
+        raise AssertionError("expected the limiter to reject")
+
+    keys = [f"10.0.{i // 256}.{i % 256}" for i in range(args.keys)]
+    position = iter(range(10 ** 12))
+    allowed = lambda: limiter.allow(keys[next(position) % len(keys)])
+
+    print(f"local backend, {args.keys} tracked keys")
+    report("enforce() rejecting", timed(rejected, args.repeat), unit="us")
+    report("allow() under the limit", timed(allowed, args.repeat), unit="us")
+
+    # Through the app (TestClient overhead included): exhaust the IP limiter, then time 429s
+    logging.getLogger("httpx").setLevel(logging.WARNING)
+    client = TestClient(app)
+    body = {"voucher_number": "BENCH-0000", "pin": "000000"}
+    for _ in range(verify_ip_limiter.limit):
+        verify_ip_limiter.allow("testclient")
+    post = lambda: client.post("/api/v1/evoucher/verify", json=body)
+    assert post().status_code == 429
+    report("POST /evoucher/verify -> 429 (ASGI)", timed(post, min(args.repeat, 2000)), unit="us")
+
+if __name__ == "__main__":
+    main()
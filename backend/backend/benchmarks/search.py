@@ -0,0 +1,66 @@
+"""
+Student search: the previous ILIKE '%term%' filter vs app.core.search.text_search.
+
+    python -m benchmarks.search --url postgresql+psycopg2://.../scratch --students 50000
+
+Use a scratch database: the schema is created (with the pg_trgm indexes) and
+dropped again. Needs the pg_trgm extension to be available on Postgres.
+"""
+import argparse
+import random
+from datetime import date
+from benchmarks.common import report, timed, use_database
+
+SYLLABLES = ["ko", "fi", "am", "a", "ma", "ku", "ya", "ab", "ena", "kwa", "me", "so", "ad", "jo", "e", "wu", "si", "na"]
+
+def fake_name(rng: random.Random) -> str:
+    return "".join(rng.choice(SYLLABLES) for _ in range(rng.randint(2, 4))).capitalize()
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--url", required=True, help="scratch database URL")
+    parser.add_argument("--students", type=int, default=20000)
+    parser.add_argument("--repeat", type=int, default=50, help="runs per search term")
+    args = parser.parse_args()
+    use_database(args.url)
+
+    from sqlalchemy import insert, or_, select, text
+    from app.core.search import create_trigram_indexes, text_search
+    from app.db.base import Base
+    from app.db.session import SessionLocal, engine
+    from app.modules.students.models import Gender, Student
+
+    Base.metadata.drop_all(engine)
+    Base.metadata.create_all(engine)
+    try:
+        with engine.begin() as connection:
+            create_trigram_indexes(connection)
+            rng = random.Random(7)
+            rows = [
+                {
+                    "first_name": fake_name(rng), "last_name": fake_name(rng),
+                    "index_number": f"SCH/JHS/26/{i:05d}", "gender": Gender.MALE,
+                    "date_of_birth": date(2012, 1, 1), "nationality": "Ghanaian",
+                }
+                for i in range(args.students)
+            ]
+            for start in range(0, len(rows), 5000):
+                connection.execute(insert(Student), rows[start:start + 5000])
+            if connection.dialect.name == "postgresql":
+                connection.execute(text("ANALYZE student"))
+
+        columns = [Student.first_name, Student.last_name, Student.index_number]
+        terms = ["kofi", "Ama", "mensa", "26/0042", "kwame"]
+        print(f"{args.students} students on {engine.dialect.name}")
+        with SessionLocal() as db:
+            for term in terms:
+                ilike = select(Student.id).where(or_(*[c.ilike(f"%{term}%") for c in columns])).order_by(Student.id).limit(50)
+                search_filter, rank = text_search(db, columns, term)
+                ranked = select(Student.id).where(search_filter).order_by(rank.desc(), Student.id).limit(50)
+                report(f"ILIKE       {term!r}", timed(lambda: db.execute(ilike).all(), args.repeat))
+                report(f"text_search {term!r}", timed(lambda: db.execute(ranked).all(), args.repeat))
+    finally:
+        Base.metadata.drop_all(engine)
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+"""
+JWT verification cost per request: plain jwt.decode vs TokenVerifier, for HS256 and
+RS256 (no database needed).
+
+    python -m benchmarks.tokens --repeat 20000
+
+For each algorithm, times a full signature check (what every request paid before,
+and what refresh tokens still pay with cache=False) and a verify-cache hit (a
+repeat request with the same access token).
+"""
+import argparse
+import os
+import tempfile
+from datetime import datetime, timedelta
+from benchmarks.common import report, timed, use_database
+
+def rsa_key_files(directory: str):
+    from cryptography.hazmat.primitives import serialization
+    from cryptography.hazmat.primitives.asymmetric import rsa
+
+    key = rsa.generate_private_key(public_exponent=65537, key_size=2048)
+    private_path, public_path = os.path.join(directory, "private.pem"), os.path.join(directory, "public.pem")
+    with open(private_path, "wb") as f:
+        f.write(key.private_bytes(
+            serialization.Encoding.PEM, serialization.PrivateFormat.PKCS8, serialization.NoEncryption()
+        ))
+    with open(public_path, "wb") as f:
+        f.write(key.public_key().public_bytes(
+            serialization.Encoding.PEM, serialization.PublicFormat.SubjectPublicKeyInfo
+        ))
+    return private_path, public_path
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=20000)
+    args = parser.parse_args()
+    use_database("sqlite://")
+
+    from jose import jwt
+    from app.core.tokens import TokenKeys, TokenVerifier
+
+    claims = {
+        "sub": "std_1", "id": 1, "type": "student",
+        "exp": datetime.utcnow() + timedelta(hours=1),
+    }
+    with tempfile.TemporaryDirectory() as directory:
+        private_path, public_path = rsa_key_files(directory)
+        for algorithm in ("HS256", "RS256"):
+            keys = TokenKeys(algorithm, "bench-secret", "bench", private_path, {"bench": public_path})
+            verifier = TokenVerifier(keys, maxsize=10000)
+            token = verifier.encode(claims)
+            key = keys.verification_key(token)
+            verifier.decode(token)
+
+            print(algorithm)
+            report("  jwt.decode", timed(lambda: jwt.decode(token, key, algorithms=[algorithm]), args.repeat), unit="us")
+            report("  TokenVerifier.decode(cache=False)", timed(lambda: verifier.decode(token, cache=False), args.repeat), unit="us")
+            report("  TokenVerifier.decode, cache hit", timed(lambda: verifier.decode(token), args.repeat), unit="us")
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,6 @@
 from app.db.session import engine
 from app.db.base import Base
+from app.core.search import create_trigram_indexes
 # Import all models here so SQLAlchemy knows about them
 from app.shared.models.school import School
 from app.shared.models.user import User
@@ -10,6 +11,9 @@ from app.modules.evoucher.models import EVoucher, VoucherAttemptLog
 def init_db():
     print("Creating database tables...")
     Base.metadata.create_all(bind=engine)
+    # Search indexes need pg_trgm, so they are created outside the model metadata
+    with engine.begin() as connection:
+        create_trigram_indexes(connection)
     print("Tables created successfully.")
 
 if __name__ == "__main__":
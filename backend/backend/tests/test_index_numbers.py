@@ -0,0 +1,31 @@
+from app.modules.admissions.service import AdmissionsService
+from app.modules.students.importer import StudentImport
+
+def _row(first_name: str, index_number: str) -> dict:
+    return {
+        "first_name": first_name, "last_name": "Boateng", "gender": "Male",
+        "date_of_birth": "2012-03-04", "nationality": "Ghanaian", "index_number": index_number,
+    }
+
+def test_allocation_continues_after_imported_numbers(db):
+    assert AdmissionsService.allocate_index_numbers(db, "JHS 1", "2026/2027", count=2) == [
+        "SCH/JHS/26/0001", "SCH/JHS/26/0002"
+    ]
+    db.commit()
+
+    result = StudentImport(db, chunk_size=10, activate_accounts=True).run(iter([
+        _row("Yaw", "SCH/JHS/26/0050"),
+        _row("Kwesi", "SCH/JHS/26/0007"),
+        _row("Akua", "LEGACY-0099"),
+    ]))
+    assert result["imported"] == 3
+
+    # Past the highest imported number in the series, not the counter's old position
+    assert AdmissionsService.allocate_index_numbers(db, "JHS 2", "2026/2027") == ["SCH/JHS/26/0051"]
+    # Other series are untouched
+    assert AdmissionsService.allocate_index_numbers(db, "Primary 4", "2026/2027") == ["SCH/PRI/26/0001"]
+
+def test_first_allocation_starts_after_imported_numbers(db):
+    StudentImport(db, chunk_size=10, activate_accounts=True).run(iter([_row("Yaw", "SCH/JHS/26/0012")]))
+
+    assert AdmissionsService.allocate_index_numbers(db, "JHS 1", "2026/2027") == ["SCH/JHS/26/0013"]
@@ -0,0 +1,15 @@
+import io
+from app.core import logging as app_logging
+
+def test_records_after_shutdown_are_written_directly(monkeypatch):
+    output = io.StringIO()
+    for handler in app_logging._listener.handlers:
+        monkeypatch.setattr(handler, "stream", output)
+    monkeypatch.setattr(app_logging._queue_handler, "dropped", 3)
+    app_logging.shutdown_logging()
+
+    app_logging.logger.warning("late shutdown step")
+
+    assert "Dropped 3 log records" in output.getvalue()
+    assert "late shutdown step" in output.getvalue()
+    assert app_logging._queue_handler.queue.empty()
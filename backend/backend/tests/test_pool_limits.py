@@ -0,0 +1,28 @@
+import pytest
+from app.core.config import Settings
+
+def _settings(**overrides) -> Settings:
+    return Settings(DATABASE_URL="postgresql://u:p@db/app", DB_POOL_SIZE=5, DB_MAX_OVERFLOW=10, **overrides)
+
+def _primary_connections(settings: Settings) -> int:
+    pool_size, max_overflow = settings.db_pool_limits
+    return (2 if settings.DB_ASYNC else 1) * (pool_size + max_overflow)
+
+def test_unbudgeted_pool_uses_configured_sizes():
+    assert _settings().db_pool_limits == (5, 10)
+
+@pytest.mark.parametrize("budget,workers", [(80, 4), (40, 4), (20, 3), (97, 8)])
+@pytest.mark.parametrize("db_async", [False, True])
+def test_worker_stays_within_its_budget_share(budget, workers, db_async):
+    settings = _settings(DB_CONNECTION_BUDGET=budget, WEB_CONCURRENCY=workers, DB_ASYNC=db_async)
+
+    assert _primary_connections(settings) <= budget // workers
+
+def test_async_engine_halves_each_primary_pool():
+    sync_only = _settings(DB_CONNECTION_BUDGET=80, WEB_CONCURRENCY=4)
+    with_async = _settings(DB_CONNECTION_BUDGET=80, WEB_CONCURRENCY=4, DB_ASYNC=True)
+
+    assert sync_only.db_pool_limits == (5, 10)
+    assert with_async.db_pool_limits == (5, 5)
+    # The replica is another server: its single engine keeps the whole share
+    assert with_async.pool_limits() == (5, 10)
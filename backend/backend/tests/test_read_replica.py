@@ -0,0 +1,67 @@
+import pytest
+from sqlalchemy import create_engine, update
+from sqlalchemy.exc import InvalidRequestError
+from app.db import session as db_session
+from app.db.base import Base
+from app.db.replica import ReplicaMonitor
+from app.modules.academics.models import AcademicYear
+
+@pytest.fixture
+def primary(db, monkeypatch):
+    db.add(AcademicYear(name="primary"))
+    db.commit()
+    monkeypatch.setattr(db_session, "PrimaryReadSessionLocal", db_session.read_sessionmaker(db.get_bind()))
+    return db.get_bind()
+
+def _use_replica(monkeypatch, url: str, max_lag: float = 5.0) -> ReplicaMonitor:
+    engine = create_engine(url)
+    monitor = ReplicaMonitor(engine, max_lag=max_lag, check_interval=60)
+    monkeypatch.setattr(db_session, "replica_monitor", monitor)
+    monkeypatch.setattr(db_session, "ReplicaSessionLocal", db_session.read_sessionmaker(engine))
+    return monitor
+
+@pytest.fixture
+def replica_url(tmp_path):
+    """A SQLite file standing in for the replica."""
+    url = f"sqlite:///{tmp_path / 'replica.db'}"
+    engine = create_engine(url)
+    Base.metadata.create_all(engine)
+    with engine.begin() as connection:
+        connection.execute(AcademicYear.__table__.insert().values(name="replica"))
+    engine.dispose()
+    return url
+
+def _read_year_names():
+    with db_session.ReadSessionLocal() as read_db:
+        return [name for (name,) in read_db.query(AcademicYear.name)]
+
+def test_reads_go_to_a_healthy_replica(primary, replica_url, monkeypatch):
+    _use_replica(monkeypatch, replica_url)
+
+    assert _read_year_names() == ["replica"]
+
+def test_lagging_replica_falls_back_to_primary(primary, replica_url, monkeypatch):
+    monitor = _use_replica(monkeypatch, replica_url, max_lag=5.0)
+    monkeypatch.setattr(monitor, "measure_lag", lambda: 30.0)
+
+    assert _read_year_names() == ["primary"]
+    assert monitor.last_lag == 30.0
+
+def test_unreachable_replica_falls_back_to_primary(primary, tmp_path, monkeypatch):
+    monitor = _use_replica(monkeypatch, f"sqlite:///{tmp_path / 'missing' / 'replica.db'}")
+
+    assert _read_year_names() == ["primary"]
+    assert monitor.last_lag is None
+
+def test_read_sessions_reject_writes(primary, replica_url, monkeypatch):
+    _use_replica(monkeypatch, replica_url)
+
+    with db_session.ReadSessionLocal() as read_db:
+        read_db.add(AcademicYear(name="written"))
+        with pytest.raises(InvalidRequestError):
+            read_db.commit()
+    with db_session.ReadSessionLocal() as read_db:
+        with pytest.raises(InvalidRequestError):
+            read_db.execute(update(AcademicYear).values(name="written"))
+
+    assert _read_year_names() == ["replica"]
@@ -0,0 +1,49 @@
+import time
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from app.core.token_revocation import LocalRevocationBackend, revocation_store
+from app.modules.students.auth import issue_refresh_token, load_principal, principal_cache, revoke_sessions, rotate_refresh_token
+from app.modules.students.models import Gender, Student, StudentAccount
+
+@pytest.fixture
+def principal(db, monkeypatch):
+    # A fresh store stands in for another worker's: it has seen none of this worker's rotations
+    monkeypatch.setattr(revocation_store, "backend", LocalRevocationBackend())
+    student = Student(
+        first_name="Ama", last_name="Mensah", gender=Gender.FEMALE,
+        date_of_birth=date(2012, 1, 1), nationality="Ghanaian"
+    )
+    db.add(student)
+    db.flush()
+    db.add(StudentAccount(student_id=student.id, username="std_ama", hashed_password="x", is_active=True))
+    db.commit()
+    principal = load_principal(db, "std_ama")
+    principal_cache.put(principal)
+    yield principal
+    principal_cache.invalidate(principal.student_id)
+
+def test_refresh_token_rotates_once(db, principal):
+    token = issue_refresh_token(principal)
+    _, replacement = rotate_refresh_token(db, token)
+
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db, token)
+    # Replaying a spent token ends the whole family
+    with pytest.raises(HTTPException):
+        rotate_refresh_token(db, replacement)
+
+def test_password_change_revokes_earlier_refresh_tokens(db, principal):
+    before = issue_refresh_token(principal)
+    time.sleep(0.01)
+    revoke_sessions(db, principal.student_id)
+    db.commit()
+    time.sleep(0.01)
+    after = issue_refresh_token(principal)
+
+    # The cut-off is read from the account, not this worker's cache or revocation store
+    assert principal_cache.get(principal.student_id).tokens_valid_after is None
+    with pytest.raises(HTTPException) as revoked:
+        rotate_refresh_token(db, before)
+    assert revoked.value.status_code == 401
+    rotate_refresh_token(db, after)
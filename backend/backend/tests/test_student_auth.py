@@ -0,0 +1,39 @@
+from datetime import date
+import pytest
+from fastapi import HTTPException
+from app.core.security import create_access_token
+from app.core.tokens import token_verifier
+from app.modules.students.auth import get_current_principal, load_principal, principal_cache, principal_claims
+from app.modules.students.models import Gender, Student, StudentAccount
+
+@pytest.fixture
+def account(db):
+    student = Student(
+        first_name="Kofi", last_name="Asante", gender=Gender.MALE,
+        date_of_birth=date(2012, 1, 1), nationality="Ghanaian"
+    )
+    db.add(student)
+    db.flush()
+    account = StudentAccount(student_id=student.id, username="std_kofi", hashed_password="x", is_active=True)
+    db.add(account)
+    db.commit()
+    yield account
+    principal_cache.invalidate(student.id)
+
+def test_access_token_carries_identity_only(db, account):
+    token = create_access_token(data=principal_claims(load_principal(db, "std_kofi")))
+
+    claims = token_verifier.decode(token)
+    assert {k: claims[k] for k in ("sub", "id", "type")} == {"sub": "std_kofi", "id": account.student_id, "type": "student"}
+    assert not {"acc", "act", "mcp"} & claims.keys()
+    assert get_current_principal(db, token).student_id == account.student_id
+
+def test_deactivated_account_is_rejected_before_its_token_expires(db, account):
+    token = create_access_token(data=principal_claims(load_principal(db, "std_kofi")))
+    account.is_active = False
+    db.commit()
+    principal_cache.invalidate(account.student_id)
+
+    with pytest.raises(HTTPException) as rejected:
+        get_current_principal(db, token)
+    assert rejected.value.status_code == 401
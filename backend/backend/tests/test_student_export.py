@@ -0,0 +1,24 @@
+from app.modules.students import service
+from app.modules.students.models import EnrollmentStatus, StudentEnrollment
+from app.modules.students.service import StudentService
+from tests.test_student_listing import _seed
+
+def test_export_hides_placement_unless_enrollment_is_active(db, monkeypatch):
+    _seed(db, 4)
+    enrollment = db.query(StudentEnrollment).order_by(StudentEnrollment.student_id).first()
+    enrollment.status = EnrollmentStatus.INACTIVE
+    inactive_id = enrollment.student_id
+    db.commit()
+    monkeypatch.setattr(service, "ReadSessionLocal", lambda: db)
+
+    exported = {row["id"]: row for row in StudentService.export_students()}
+    listed = {s.id: s for s in StudentService.list_students(db, page=1, size=10)}
+
+    assert exported.keys() == listed.keys()
+    for student_id, row in exported.items():
+        student = listed[student_id]
+        assert row["status"] == student.status
+        assert row["current_class"] == student.current_class
+        assert row["current_stream"] == student.current_stream
+        assert row["admission_year"] == student.admission_year
+    assert exported[inactive_id]["current_class"] == "N/A"
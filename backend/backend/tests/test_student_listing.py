@@ -0,0 +1,79 @@
+from datetime import date, datetime, timedelta
+from sqlalchemy import event
+from app.modules.academics.models import AcademicYear, ClassRoom, Stream, Term
+from app.modules.admissions.models import Admission, AdmissionStatus
+from app.modules.evoucher.models import EVoucher
+from app.modules.students.models import Gender, Guardian, Student, StudentAccount, StudentMedical
+from app.modules.students.schemas import StudentResponse
+from app.modules.students.service import StudentService
+
+# One query for the page plus one per eager-loaded relationship; never one per student
+MAX_LISTING_STATEMENTS = 8
+
+def _seed(db, count: int):
+    year = AcademicYear(name="2026/2027")
+    class_room = ClassRoom(name="JHS 1", level="JHS")
+    db.add_all([year, class_room])
+    db.flush()
+    stream = Stream(class_id=class_room.id, name="A")
+    term = Term(academic_year_id=year.id, name="Term 1")
+    db.add_all([stream, term])
+    db.flush()
+
+    student_ids = []
+    for i in range(count):
+        student = Student(
+            first_name=f"Ama{i}", last_name=f"Mensah{i}", gender=Gender.FEMALE,
+            date_of_birth=date(2012, 1, 1), nationality="Ghanaian"
+        )
+        db.add(student)
+        db.flush()
+        voucher = EVoucher(
+            voucher_number=f"V{i:05d}", pin_hash="x", academic_year_id=year.id,
+            expires_at=datetime.utcnow() + timedelta(days=30)
+        )
+        db.add_all([
+            Guardian(student_id=student.id, name="Kofi", relationship_type="Father", phone="024", address="Accra"),
+            Guardian(student_id=student.id, name="Esi", relationship_type="Mother", phone="020", address="Accra"),
+            StudentMedical(student_id=student.id),
+            StudentAccount(student_id=student.id, username=f"std_{student.id}", hashed_password="x"),
+            voucher,
+        ])
+        db.flush()
+        db.add(Admission(
+            student_id=student.id, academic_year_id=year.id, class_id=class_room.id,
+            stream_id=stream.id, term_id=term.id, voucher_id=voucher.id,
+            status=AdmissionStatus.APPROVED if i % 2 == 0 else AdmissionStatus.PENDING
+        ))
+        student_ids.append(student.id)
+    StudentService.refresh_enrollments(db, student_ids)
+    db.commit()
+
+def _listing_statements(db, **filters) -> int:
+    """Statements issued to list a page and serialize it as the endpoint does."""
+    db.expunge_all()
+    statements = []
+    listener = lambda conn, cursor, statement, *args: statements.append(statement)
+    engine = db.get_bind()
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        students = StudentService.list_students(db, **filters)
+        [StudentResponse.model_validate(s) for s in students]
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    return len(statements)
+
+def test_listing_statement_count_does_not_grow_with_page_size(db):
+    _seed(db, 60)
+
+    small = _listing_statements(db, page=1, size=5)
+    large = _listing_statements(db, page=1, size=60)
+
+    assert large == small
+    assert large <= MAX_LISTING_STATEMENTS
+
+def test_filtered_listing_statement_count_is_bounded(db):
+    _seed(db, 40)
+
+    assert _listing_statements(db, status="Active", page=1, size=40) <= MAX_LISTING_STATEMENTS
+    assert _listing_statements(db, search="mensah", page=1, size=40) <= MAX_LISTING_STATEMENTS
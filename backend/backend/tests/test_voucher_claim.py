@@ -0,0 +1,62 @@
+import threading
+import uuid
+from datetime import datetime, timedelta
+from sqlalchemy.orm import sessionmaker
+from app.modules.academics.models import AcademicYear
+from app.modules.evoucher.models import EVoucher, VoucherStatus
+from app.modules.evoucher.repository import EVoucherRepository
+from app.modules.evoucher.service import RESERVATION_TTL_MINUTES
+
+CONTENDERS = 16
+ROUNDS = 10
+
+def _new_voucher(Session) -> int:
+    with Session() as db:
+        year = AcademicYear(name=f"claim-{uuid.uuid4().hex[:8]}")
+        db.add(year)
+        db.flush()
+        voucher = EVoucher(
+            voucher_number=f"CLAIM-{uuid.uuid4().hex[:10]}", pin_hash="x",
+            academic_year_id=year.id, expires_at=datetime.utcnow() + timedelta(days=1)
+        )
+        db.add(voucher)
+        db.commit()
+        return voucher.id
+
+def test_concurrent_claims_have_exactly_one_winner(pg_engine):
+    Session = sessionmaker(autocommit=False, autoflush=False, bind=pg_engine)
+
+    for round_number in range(ROUNDS):
+        voucher_id = _new_voucher(Session)
+        barrier = threading.Barrier(CONTENDERS)
+        results = [None] * CONTENDERS
+        errors = []
+
+        def contend(i: int):
+            try:
+                with Session() as db:
+                    now = datetime.utcnow()
+                    barrier.wait()
+                    results[i] = EVoucherRepository.claim(
+                        db, voucher_id, f"session-{round_number}-{i}", now,
+                        reservation_cutoff=now - timedelta(minutes=RESERVATION_TTL_MINUTES)
+                    )
+                    db.commit()
+            except Exception as e: # surfaced below; a thread can't fail the test itself
+                errors.append(e)
+
+        threads = [threading.Thread(target=contend, args=(i,)) for i in range(CONTENDERS)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert not errors
+        winners = [i for i, result in enumerate(results) if result is not None]
+        assert len(winners) == 1
+        assert results[winners[0]][0] == VoucherStatus.RESERVED
+
+        with Session() as db:
+            voucher = db.get(EVoucher, voucher_id)
+            assert voucher.status == VoucherStatus.RESERVED
+            assert voucher.reserved_session_id == f"session-{round_number}-{winners[0]}"
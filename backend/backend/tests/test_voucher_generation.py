@@ -0,0 +1,58 @@
+import json
+from datetime import datetime, timedelta
+import pytest
+from fastapi import HTTPException
+from sqlalchemy.exc import OperationalError
+from app.modules.academics.models import AcademicYear
+from app.modules.evoucher import service
+from app.modules.evoucher.models import EVoucher
+from app.modules.evoucher.repository import EVoucherRepository
+from app.modules.evoucher.schemas import EVoucherBulkCreate, EVoucherCreate, VoucherExportFormat
+from app.modules.evoucher.service import EVoucherService
+
+@pytest.fixture
+def year_id(db, monkeypatch):
+    # PIN hashing is not under test; keep it out of the process pool
+    monkeypatch.setattr(service, "hash_voucher_pins", lambda pins: [f"hash-{pin}" for pin in pins])
+    year = AcademicYear(name="2026/2027")
+    db.add(year)
+    db.commit()
+    return year.id
+
+def _fail_on_chunk(monkeypatch, failing_chunk: int):
+    insert = EVoucherRepository.bulk_insert
+    calls = iter(range(1, 10 ** 6))
+    def bulk_insert(db, rows):
+        if next(calls) == failing_chunk:
+            raise OperationalError("INSERT", {}, Exception("connection lost"))
+        insert(db, rows)
+    monkeypatch.setattr(EVoucherRepository, "bulk_insert", staticmethod(bulk_insert))
+
+def test_failed_chunk_reports_committed_vouchers(db, year_id, monkeypatch):
+    monkeypatch.setattr(service.settings, "VOUCHER_BATCH_CHUNK_SIZE", 4)
+    _fail_on_chunk(monkeypatch, 3)
+    obj_in = EVoucherCreate(academic_year_id=year_id, count=10, expires_at=datetime.utcnow() + timedelta(days=30))
+
+    with pytest.raises(HTTPException) as failed:
+        EVoucherService.create_vouchers(db, obj_in)
+
+    detail = failed.value.detail
+    assert detail["committed_chunks"] == 2
+    assert len(detail["vouchers"]) == 8
+    stored = {number for (number,) in db.query(EVoucher.voucher_number)}
+    assert stored == {v["voucher_number"] for v in detail["vouchers"]}
+
+def test_export_stream_ends_with_committed_count_on_failure(db, year_id, monkeypatch):
+    monkeypatch.setattr(service, "SessionLocal", lambda: db)
+    _fail_on_chunk(monkeypatch, 2)
+    obj_in = EVoucherBulkCreate(
+        academic_year_id=year_id, count=9, chunk_size=3, expires_at=datetime.utcnow() + timedelta(days=30)
+    )
+
+    lines = [json.loads(line) for line in "".join(
+        EVoucherService.stream_voucher_export(obj_in, VoucherExportFormat.NDJSON)
+    ).splitlines()]
+
+    assert len(lines) == 4
+    assert lines[-1]["committed"] == 3
+    assert lines[-1]["requested"] == 9
@@ -0,0 +1,43 @@
+from datetime import datetime, timedelta
+from app.modules.academics.models import AcademicYear
+from app.modules.evoucher.models import EVoucher, VoucherAttemptResult, VoucherStatus
+from app.modules.evoucher.repository import EVoucherRepository
+from app.modules.evoucher.service import EVoucherService
+from app.modules.evoucher.session_cache import voucher_session_cache
+
+def _reserved_session(db, token: str) -> str:
+    year = AcademicYear(name="2026/2027")
+    db.add(year)
+    db.flush()
+    now = datetime.utcnow()
+    db.add(EVoucher(
+        voucher_number="SESSION0001", pin_hash="x", academic_year_id=year.id,
+        status=VoucherStatus.RESERVED, reserved_session_id=token, reserved_at=now,
+        expires_at=now + timedelta(days=1)
+    ))
+    db.commit()
+    return token
+
+def test_released_session_is_not_served_again(db):
+    token = _reserved_session(db, "session-released")
+    assert EVoucherService.check_session(db, token).valid
+
+    EVoucherService.release_session(db, token)
+
+    response = EVoucherService.check_session(db, token)
+    assert not response.valid
+    assert response.reason == VoucherAttemptResult.NOT_FOUND
+
+def test_cached_session_released_elsewhere_is_not_served(db):
+    token = _reserved_session(db, "session-elsewhere")
+    assert EVoucherService.check_session(db, token).valid
+    assert voucher_session_cache.get(token) is not None
+
+    # Another worker releases it: the row changes, this worker's cache does not
+    EVoucherRepository.release_session(db, token)
+    db.commit()
+
+    response = EVoucherService.check_session(db, token)
+    assert not response.valid
+    assert response.reason == VoucherAttemptResult.NOT_FOUND
+    assert voucher_session_cache.get(token) is None